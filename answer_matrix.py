@@ -0,0 +1,175 @@
+"""
+Candidates x questions answer matrix.
+
+Each submission stores one ``Q<id>_Answer`` value per question it was served;
+a candidate sees 40 of the bank's questions (see ``form_engine.form_ids``),
+so every other column is empty. ``build_answer_matrix`` parses those columns
+with vectorized comparisons into two bit-packed matrices over every question
+id in the bank, in bank order:
+
+- ``correct``: the answer was correct
+- ``served``:  the question was part of the candidate's form (its complement
+  is the "not served" mask)
+
+For multiple-choice questions the options a candidate picked are kept too,
+as one ``uint8`` bitmask per candidate and question in ``selected`` (option
+A = 1, B = 2, C = 4, ...; 0 = not recorded), from the ``Q<id>_Selected``
+record fields.
+
+The matrix is cached per submissions frame and extended in place of a
+rebuild when new submissions are appended.
+
+Rows are bit-packed along the question axis (``numpy.packbits``), so 100k
+attempts over 81 questions take about 2 MB for both matrices. Aggregates are
+computed on the packed rows where possible and unpack one block of rows at a
+time otherwise.
+"""
+import collections
+import threading
+
+import numpy as np
+import pandas as pd
+
+UNPACK_BLOCK_ROWS = 65536
+
+AnswerMatrix = collections.namedtuple(
+    "AnswerMatrix", ["question_ids", "correct", "served", "option_ids", "selected"]
+)
+
+# Bits set in each byte value, for counting over packed rows
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+_LOCK = threading.Lock()
+_CACHED = (None, None, None)  # (frame, (question ids, option ids), matrix)
+
+
+def answer_column(question_id):
+    return f"Q{question_id}_Answer"
+
+
+def selected_column(question_id):
+    return f"Q{question_id}_Selected"
+
+
+def option_mask(letters):
+    """Bitmask of selected option letters ("A, C" -> 0b101)."""
+    return sum(1 << (ord(letter.strip().upper()) - ord("A")) for letter in letters.split(",") if letter.strip())
+
+
+def parse_answers(values):
+    """(correct, served) boolean arrays for one answer column (bools or strings)."""
+    values = np.asarray(values, dtype=object)
+    served = ~pd.isna(values) & (values != "")
+    correct = values == True  # noqa: E712 (elementwise)
+    # Strings (e.g. imported from CSV) are the rare case: only they get text handling
+    text = served & ~correct & (values != False)  # noqa: E712
+    if text.any():
+        correct[text] = np.char.lower(np.char.strip(values[text].astype(str))) == "true"
+    return correct, served
+
+
+def build_answer_matrix(frame, question_ids, option_ids=()):
+    """
+    Bit-packed answer matrix for a submissions frame over ``question_ids``,
+    with option selections for the multiple-choice ``option_ids``.
+    """
+    question_ids = tuple(question_ids)
+    option_ids = tuple(option_ids)
+    rows = len(frame)
+    correct = np.zeros((rows, len(question_ids)), dtype=bool)
+    served = np.zeros((rows, len(question_ids)), dtype=bool)
+    for j, question_id in enumerate(question_ids):
+        column = answer_column(question_id)
+        if column in frame.columns:
+            correct[:, j], served[:, j] = parse_answers(frame[column].to_numpy())
+    selected = np.zeros((rows, len(option_ids)), dtype=np.uint8)
+    for j, question_id in enumerate(option_ids):
+        column = selected_column(question_id)
+        if column in frame.columns:
+            selected[:, j] = pd.to_numeric(frame[column], errors="coerce").fillna(0).to_numpy(dtype=np.uint8)
+    return AnswerMatrix(
+        question_ids, np.packbits(correct, axis=1), np.packbits(served, axis=1), option_ids, selected
+    )
+
+
+def cached_answer_matrix(frame, question_ids, option_ids=()):
+    """
+    ``build_answer_matrix`` memoized on the frame object. The submissions
+    frame is shared and replaced (not modified) when the store changes; if
+    the new frame only appends rows to the cached one (same ``lineage`` attr,
+    see ``submission_store.load_submissions``), just the new rows are parsed.
+    """
+    global _CACHED
+    key = (tuple(question_ids), tuple(option_ids))
+    lineage = frame.attrs.get("lineage")
+    with _LOCK:
+        cached_frame, cached_key, matrix = _CACHED
+    if cached_key == key:
+        if cached_frame is frame:
+            return matrix
+        rows = len(matrix.correct)
+        if lineage is not None and cached_frame.attrs.get("lineage") == lineage and len(frame) >= rows:
+            tail = build_answer_matrix(frame.iloc[rows:], *key)
+            matrix = AnswerMatrix(
+                matrix.question_ids,
+                np.concatenate([matrix.correct, tail.correct]),
+                np.concatenate([matrix.served, tail.served]),
+                matrix.option_ids,
+                np.concatenate([matrix.selected, tail.selected]),
+            )
+        else:
+            matrix = build_answer_matrix(frame, *key)
+    else:
+        matrix = build_answer_matrix(frame, *key)
+    with _LOCK:
+        _CACHED = (frame, key, matrix)
+    return matrix
+
+
+def unpack(packed, question_count, start=0, stop=None):
+    """Boolean rows ``start:stop`` of a packed matrix."""
+    return np.unpackbits(packed[start:stop], axis=1, count=question_count).astype(bool)
+
+
+def iter_blocks(matrix, block_rows=UNPACK_BLOCK_ROWS):
+    """Yield (start, correct, served) boolean blocks of rows."""
+    count = len(matrix.question_ids)
+    for start in range(0, len(matrix.correct), block_rows):
+        stop = start + block_rows
+        yield start, unpack(matrix.correct, count, start, stop), unpack(matrix.served, count, start, stop)
+
+
+# ==========================
+# Aggregates
+# ==========================
+def candidate_totals(matrix):
+    """(questions served, questions correct) per candidate."""
+    served = _POPCOUNT[matrix.served].sum(axis=1, dtype=np.int64)
+    correct = _POPCOUNT[matrix.correct].sum(axis=1, dtype=np.int64)
+    return served, correct
+
+
+def candidate_scores(matrix):
+    """Percentage of served questions answered correctly, per candidate (NaN if none)."""
+    served, correct = candidate_totals(matrix)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(served > 0, correct / served * 100, np.nan)
+
+
+def question_totals(matrix):
+    """(times served, times correct) per question, in ``question_ids`` order."""
+    served = np.zeros(len(matrix.question_ids), dtype=np.int64)
+    correct = np.zeros(len(matrix.question_ids), dtype=np.int64)
+    for _, correct_block, served_block in iter_blocks(matrix):
+        served += served_block.sum(axis=0)
+        correct += correct_block.sum(axis=0)
+    return served, correct
+
+
+def to_frame(matrix):
+    """Display frame: True/False per served question, None where not served."""
+    count = len(matrix.question_ids)
+    correct = unpack(matrix.correct, count)
+    served = unpack(matrix.served, count)
+    values = np.where(served, correct, None)
+    return pd.DataFrame(values, columns=[answer_column(q) for q in matrix.question_ids])
@@ -0,0 +1,46 @@
+"""
+Compact per-session attempt state.
+
+A session keeps its form as the tuple of question ids from
+``form_engine.form_ids`` (one tuple shared by every session of the same
+user) and one ``Answer`` per answered question. An answer holds only what
+the candidate produced; the question text, type and reference answer are
+looked up in the shared question bank when the results page needs them, so
+none of the bank's text is copied into session state.
+"""
+from question_bank import load_question_bank
+
+
+class Answer:
+    """One answered question: id, the candidate's answer, verdict and credit."""
+
+    __slots__ = ("question_id", "your_answer", "is_correct", "credit")
+
+    def __init__(self, question_id, your_answer, is_correct, credit):
+        self.question_id = question_id
+        self.your_answer = your_answer  # SQL text, or the selected letters ("A, C")
+        self.is_correct = is_correct
+        self.credit = credit
+
+    def __repr__(self):
+        return f"Answer({self.question_id!r}, {self.your_answer!r}, {self.is_correct!r}, {self.credit!r})"
+
+    @property
+    def question(self):
+        """The bank's question mapping."""
+        return load_question_bank().by_id[self.question_id]
+
+    @property
+    def type(self):
+        return self.question.get("type", "sql")
+
+    @property
+    def question_text(self):
+        return self.question["question"]
+
+    @property
+    def correct_answer(self):
+        question = self.question
+        if question.get("type") == "mcq":
+            return ", ".join(question["correct_answers"])
+        return question["solution"]
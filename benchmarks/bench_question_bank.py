@@ -0,0 +1,69 @@
+"""
+Micro-benchmark: cost of obtaining the question bank on a Streamlit rerun.
+
+- "rebuild":  what every rerun used to pay, evaluating the bank literals and
+              assigning SQL complexity levels (simulated from questions.json)
+- "load":     an uncached load_question_bank (read, parse, build, freeze)
+- "cached":   the memoized load_question_bank call a rerun makes now
+
+Usage: python benchmarks/bench_question_bank.py [--repeat 200]
+"""
+import argparse
+import json
+import pathlib
+import sys
+import timeit
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import question_bank  # noqa: E402
+
+
+def legacy_rebuild(source):
+    """Evaluate the bank as Python literals and assign complexity, as app.py did."""
+    namespace = {}
+    exec(source, namespace)
+    for question in namespace["QUESTIONS"]:
+        question["complexity"] = question_bank.assign_complexity_level(question)
+    for question in namespace["POWERBI_QUESTIONS"]:
+        if "complexity" not in question:
+            question["complexity"] = 2
+    return namespace
+
+
+def literal_source():
+    """The bank rendered as the module-level literals app.py used to contain."""
+    data = json.loads(question_bank.BANK_PATH.read_text(encoding="utf-8"))
+    return f"QUESTIONS = {data['sql']!r}\nPOWERBI_QUESTIONS = {data['powerbi']!r}\n"
+
+
+def per_call_us(func, repeat):
+    timer = timeit.Timer(func)
+    return min(timer.repeat(repeat=5, number=repeat)) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    source = literal_source()
+    uncached = question_bank.load_question_bank.__wrapped__
+    question_bank.load_question_bank()  # warm the cache
+
+    rows = [
+        ("rebuild (literals + complexity)", lambda: legacy_rebuild(source)),
+        ("load_question_bank, uncached", uncached),
+        ("load_question_bank, cached", question_bank.load_question_bank),
+    ]
+    baseline = None
+    print(f"{'case':<34} {'us/call':>12} {'speedup':>9}")
+    for name, func in rows:
+        us = per_call_us(func, args.repeat)
+        baseline = baseline or us
+        print(f"{name:<34} {us:>12.2f} {baseline / us:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Memory benchmark: per-session attempt state after all 40 questions are answered.
+
+- "legacy":      the form as copies of the 40 question dicts (app.py rebuilt
+                 the bank on every rerun, so each session kept its own) and
+                 one dict per answer repeating the question text and solution
+- "shared bank": the form as references into the frozen bank, answers still
+                 dicts repeating the text
+- "compact":     the form as the shared tuple of ids from form_engine and one
+                 attempt.Answer (__slots__) per answer
+
+Memory is measured with tracemalloc over --sessions simulated sessions, so
+anything shared between sessions (the bank, the memoized id tuples) is only
+counted where a session allocates it.
+
+Usage: python benchmarks/bench_session_state.py [--sessions 200]
+"""
+import argparse
+import pathlib
+import sys
+import tracemalloc
+import types
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import attempt  # noqa: E402
+import form_engine  # noqa: E402
+import question_bank  # noqa: E402
+
+
+def thaw(value):
+    """Plain dict/list copy of a frozen bank value."""
+    if isinstance(value, (dict, types.MappingProxyType)):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+def candidate_answer(question):
+    """A fresh string the size of a typical answer (the reference, or the selected letters)."""
+    if question.get("type") == "mcq":
+        return ", ".join(question["correct_answers"])
+    return "".join(question["solution"])
+
+
+def answer_dict(question):
+    mcq = question.get("type") == "mcq"
+    return {
+        "question_id": question["id"],
+        "question": question["question"],
+        "your_answer": candidate_answer(question),
+        "correct_answer": ", ".join(question["correct_answers"]) if mcq else question["solution"],
+        "is_correct": True,
+        "credit": 1.0,
+        "type": "mcq" if mcq else "sql",
+    }
+
+
+def legacy_state(bank, name):
+    form = [thaw(q) for q in form_engine.assemble_form(name, bank)]
+    return {"shuffled_questions": form, "answers": [answer_dict(q) for q in form]}
+
+
+def shared_bank_state(bank, name):
+    form = form_engine.assemble_form(name, bank)
+    return {"shuffled_questions": form, "answers": [answer_dict(q) for q in form]}
+
+
+def compact_state(bank, name):
+    ids = form_engine.form_ids(name, bank)
+    answers = [attempt.Answer(qid, candidate_answer(bank.by_id[qid]), True, 1.0) for qid in ids]
+    return {"form_ids": ids, "answers": answers}
+
+
+def bytes_per_session(build, bank, names):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [build(bank, name) for name in names]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(sessions) == len(names)
+    return (after - before) / len(names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200)
+    args = parser.parse_args()
+
+    bank = question_bank.load_question_bank()
+    names = [f"Candidate {i}" for i in range(args.sessions)]
+    for name in names:
+        form_engine.form_ids(name, bank)  # memoized ids exist before a session starts
+
+    rows = [("legacy", legacy_state), ("shared bank", shared_bank_state), ("compact", compact_state)]
+    baseline = None
+    print(f"{'state':<14} {'bytes/session':>14} {'reduction':>10}")
+    for name, build in rows:
+        size = bytes_per_session(build, bank, names)
+        baseline = baseline or size
+        print(f"{name:<14} {size:>14,.0f} {baseline / size:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Micro-benchmark suite: the grading, form assembly and admin aggregation hot
+paths, over reproducible synthetic fixtures, with a JSON report.
+
+- "normalize":  normalize_sql over generated candidate corpora (see
+                bench_normalize), cold (memo cleared) and as a grading
+                workload where spellings recur (memoized)
+- "forms":      the form of each of --names generated names; the previous
+                get_shuffled_questions (global RNG, plain shuffle) against
+                form_engine.form_ids, first call and repeat
+- "mcq":        grading an MCQ answer: the set comparison the app makes, and
+                the option bitmask comparison of answer_matrix
+- "admin":      the admin pipeline over --files generated submission files,
+                stage by stage. "legacy" is the pipeline app.py used to run
+                (list the folder, pd.read_csv each file, map the answers to
+                booleans, concat, summary metrics) over a flat folder, run
+                for sizes up to --legacy-max only. "files" is the current
+                one: scan, read and index the sharded attempt files into a
+                fresh store, load the frame, build the answer matrix and
+                read the aggregates. "segments" repeats the scan, read and
+                index after the folder is compacted into daily segments.
+
+Every fixture is derived from --seed, and the report holds only medians of
+--repeat runs (single runs for the admin stages, which change state), so two
+runs on the same machine differ only by timing noise. Use it for before and
+after numbers of any change to these paths.
+
+Usage: python benchmarks/bench_suite.py [--files 1000 10000 100000] [--output benchmarks/results/bench_suite.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime, timedelta
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import answer_matrix  # noqa: E402
+import form_engine  # noqa: E402
+import sql_lexer  # noqa: E402
+import submission_files  # noqa: E402
+import submission_store  # noqa: E402
+from bench_normalize import synthetic_corpus  # noqa: E402
+from question_bank import load_question_bank  # noqa: E402
+
+DEFAULT_OUTPUT = ROOT / "benchmarks" / "results" / "bench_suite.json"
+SECTIONS = ("normalize", "forms", "mcq", "admin")
+FIXTURE_START = datetime(2026, 1, 1, 8, 0, 0)  # submissions are spread over the days after it
+FIXTURE_DAYS = 30
+
+
+def median_us(func, inputs, repeat, clear=None):
+    """Median over ``repeat`` runs of the microseconds per call of ``func`` over ``inputs``."""
+    def run():
+        if clear is not None:
+            clear()
+        for value in inputs:
+            func(value)
+    return statistics.median(timeit.repeat(run, number=1, repeat=repeat)) / len(inputs) * 1e6
+
+
+# ==========================
+# normalize_sql
+# ==========================
+def bench_normalize(bank, args):
+    solutions = [q["solution"] for q in bank.sql]
+    cold = sql_lexer.normalize_sql.__wrapped__
+    report = {}
+    for size in args.corpus:
+        corpus = synthetic_corpus(solutions, size, args.seed)
+        report[str(size)] = {
+            "distinct": len(set(corpus)),
+            "cold_us": median_us(cold, corpus, args.repeat),
+            "workload_us": median_us(sql_lexer.normalize_sql, corpus, args.repeat,
+                                     sql_lexer.normalize_sql.cache_clear),
+        }
+    return report
+
+
+# ==========================
+# Form assembly
+# ==========================
+def legacy_shuffled_questions(user_name, bank):
+    """get_shuffled_questions as app.py had it (kept for comparison)."""
+    seed = int(hashlib.md5(user_name.lower().encode()).hexdigest(), 16)
+    random.seed(seed)
+    sql_questions = list(bank.sql)
+    random.shuffle(sql_questions)
+    powerbi_questions = list(bank.powerbi)
+    random.shuffle(powerbi_questions)
+    all_questions = sql_questions[:20] + powerbi_questions[:20]
+    random.shuffle(all_questions)
+    return all_questions
+
+
+def bench_forms(bank, args):
+    names = [f"Candidate {i:06d}" for i in range(args.names)]
+    legacy = median_us(lambda name: legacy_shuffled_questions(name, bank), names, args.repeat)
+    # First call per name: the memo is cleared before every run
+    first = median_us(lambda name: form_engine.form_ids(name, bank), names, args.repeat,
+                      form_engine._form_ids.cache_clear)
+    # Repeat: a session rerun asks for the same form again
+    repeat_names = names[:form_engine.FORM_CACHE_SIZE]
+    for name in repeat_names:
+        form_engine.form_ids(name, bank)
+    repeat = median_us(lambda name: form_engine.form_ids(name, bank), repeat_names, args.repeat)
+    return {"names": args.names, "legacy_us": legacy, "first_us": first, "repeat_us": repeat}
+
+
+# ==========================
+# MCQ grading
+# ==========================
+def bench_mcq(bank, args):
+    rng = random.Random(args.seed)
+    attempts = []
+    for _ in range(args.answers):
+        question = rng.choice(bank.powerbi)
+        letters = [option.split(".")[0].strip() for option in question["options"]]
+        correct = list(question["correct_answers"])
+        chosen = correct if rng.random() < 0.6 else rng.sample(letters, rng.randint(1, len(correct)))
+        attempts.append((chosen, correct))
+    masks = [(answer_matrix.option_mask(", ".join(chosen)), answer_matrix.option_mask(", ".join(correct)))
+             for chosen, correct in attempts]
+    return {
+        "answers": args.answers,
+        "set_ns": median_us(lambda a: set(a[0]) == set(a[1]), attempts, args.repeat) * 1000,
+        "mask_ns": median_us(lambda m: m[0] == m[1], masks, args.repeat) * 1000,
+    }
+
+
+# ==========================
+# Admin pipeline
+# ==========================
+def generate_records(bank, count, seed):
+    """``count`` submission records as the results page builds them, over FIXTURE_DAYS days."""
+    rng = random.Random(seed)
+    step = FIXTURE_DAYS * 86400 / count
+    mcq_ids = {q["id"] for q in bank.powerbi}
+    records = []
+    for i in range(count):
+        name = f"Candidate {i:06d}"
+        record = {
+            "Name": name,
+            "Email": f"candidate{i:06d}@example.com",
+            "Submitted At": (FIXTURE_START + timedelta(seconds=int(i * step))).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        ability = rng.random()
+        answers = {}
+        for question_id in form_engine.form_ids(name, bank):
+            correct = rng.random() < ability
+            answers[f"Q{question_id}_Answer"] = correct
+            if question_id in mcq_ids:
+                answers[f"Q{question_id}_Selected"] = 1 << rng.randrange(4)
+        total = form_engine.FORM_SQL_QUESTIONS + form_engine.FORM_POWERBI_QUESTIONS
+        right = sum(v for k, v in answers.items() if k.endswith("_Answer"))
+        record.update({
+            "Total Questions": total,
+            "Correct Answers": right,
+            "Score (%)": round(right / total * 100, 2),
+            "Partial Score (%)": round(right / total * 100, 2),
+        })
+        record.update(answers)
+        records.append(record)
+    return records
+
+
+def write_flat_files(records, directory):
+    """One CSV per record directly in ``directory``, as earlier versions wrote them."""
+    import pandas as pd
+
+    os.makedirs(directory)
+    for record in records:
+        stamp = datetime.strptime(record["Submitted At"], "%Y-%m-%d %H:%M:%S").strftime("%Y%m%d_%H%M%S")
+        pd.DataFrame([record]).to_csv(os.path.join(directory, f"{record['Email']}_{stamp}.csv"), index=False)
+
+
+def timed(stages, name, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    stages[name] = round((time.perf_counter() - started) * 1000, 3)
+    return result
+
+
+def legacy_pipeline(directory, question_ids):
+    """The admin read app.py used to do, stage by stage (ms)."""
+    import pandas as pd
+
+    stages = {}
+    files = timed(stages, "scan", lambda: [f for f in os.listdir(directory) if f.endswith(".csv")])
+    frames = timed(stages, "read", lambda: [pd.read_csv(os.path.join(directory, f)) for f in files])
+    answer_cols = [answer_matrix.answer_column(q) for q in question_ids]
+
+    def normalize():
+        for df in frames:
+            for col in answer_cols:
+                if col in df.columns:
+                    df[col] = df[col].map(lambda x: str(x).strip().lower() == "true")
+    timed(stages, "normalize", normalize)
+    combined = timed(stages, "concat", lambda: pd.concat(frames, ignore_index=True))
+    timed(stages, "summary", lambda: (len(combined), combined["Correct Answers"].mean(),
+                                      combined["Score (%)"].mean(), combined["Name"].nunique()))
+    return stages
+
+
+def current_pipeline(directory, db_path, question_ids, option_ids):
+    """The admin read app.py does now, stage by stage (ms), against a fresh store."""
+    # load_submissions keys its process-wide frame cache by DB_PATH, so point
+    # it at this store for the run and restore it afterwards
+    previous = submission_store.DB_PATH
+    submission_store.DB_PATH = db_path
+    conn = submission_store.connect(db_path)
+    try:
+        stages = {}
+        entries = timed(stages, "scan", submission_files.scan, directory)
+        timed(stages, "read", lambda: sum(1 for path, _, source in entries
+                                          for _ in submission_files.read_records(path, source)))
+        timed(stages, "index", submission_store.import_csv_files, directory, conn)
+        frame = timed(stages, "load_frame", submission_store.load_submissions, conn)
+        timed(stages, "answer_matrix", answer_matrix.build_answer_matrix, frame, question_ids, option_ids)
+        summary = timed(stages, "summary", submission_store.aggregates, conn)
+    finally:
+        conn.close()
+        submission_store.DB_PATH = previous
+    stages["rows"] = summary["count"]
+    return stages
+
+
+def bench_admin(bank, args):
+    question_ids = tuple(bank.by_id)
+    option_ids = tuple(q["id"] for q in bank.powerbi)
+    report = {}
+    for size in args.files:
+        records = generate_records(bank, size, args.seed)
+        level = {}
+        with tempfile.TemporaryDirectory() as workdir:
+            if size <= args.legacy_max:
+                flat = os.path.join(workdir, "flat")
+                write_flat_files(records, flat)
+                level["legacy"] = legacy_pipeline(flat, question_ids)
+            sharded = os.path.join(workdir, "submissions")
+            for start in range(0, size, 1000):
+                submission_files.save_submissions(
+                    [(f"attempt{i:06d}", record) for i, record in enumerate(records[start:start + 1000], start)],
+                    sharded)
+            level["files"] = current_pipeline(sharded, os.path.join(workdir, "files.db"), question_ids, option_ids)
+            submission_files.compact(sharded)
+            level["segments"] = current_pipeline(sharded, os.path.join(workdir, "segments.db"),
+                                                 question_ids, option_ids)
+        report[str(size)] = level
+        print(f"  admin {size}: " + ", ".join(
+            f"{kind} {sum(v for k, v in stages.items() if k != 'rows'):.0f} ms" for kind, stages in level.items()))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sections", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--corpus", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--names", type=int, default=100000)
+    parser.add_argument("--answers", type=int, default=100000)
+    parser.add_argument("--files", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--legacy-max", type=int, default=10000, help="largest size the legacy admin pipeline runs for")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=pathlib.Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    bank = load_question_bank()
+    benches = {"normalize": bench_normalize, "forms": bench_forms, "mcq": bench_mcq, "admin": bench_admin}
+    results = {}
+    for section in args.sections:
+        started = time.perf_counter()
+        results[section] = benches[section](bank, args)
+        print(f"{section}: {time.perf_counter() - started:.1f} s")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "bank_version": bank.version,
+        "parameters": {k: str(v) if isinstance(v, pathlib.Path) else v for k, v in sorted(vars(args).items())},
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Load test: N candidates taking the assessment on one app server.
+
+Each candidate is a ``streamlit.testing`` AppTest session of app.py: it
+enters a name and email, answers every question of its form (SQL questions
+with the reference solution or a wrong query, MCQs by selecting the right or
+a wrong option, about --correct of the time right), and reaches the results
+page, which queues its submission.
+
+All N sessions of a level run in one process, so they share what the
+sessions of a ``streamlit run`` server share: the grading pool, the verdict
+cache, the form and question-bank caches and the submission write queue.
+AppTest swaps process-wide Streamlit state on every run, so two sessions
+cannot run at the same instant; the sessions take turns instead, one rerun
+each, round-robin. A server runs its sessions' scripts on threads that
+contend for one interpreter, so rerun throughput is what bounds it; the
+round-robin measures that throughput, but does not overlap one session's
+wait on the grading pool or the disk with another's work, so it slightly
+understates it. Each level runs in a fresh process and temporary working
+directory, so levels do not share caches and the repository's submissions
+are not touched.
+
+Reported per level:
+
+- rerun latency p50/p95/p99/max (ms), over every AppTest run of every session
+- wall time, reruns per second, and the candidates one server supports at
+  that rate if each candidate triggers a rerun every --think seconds
+  (reruns per second x think time)
+- errors (exceptions shown by the app)
+- peak RSS (MB): the server process, the largest grading-pool worker
+  (RUSAGE_CHILDREN), and an upper bound for both: the server plus each of
+  its workers at that worker peak
+- submission writes: commit and submit-to-commit latency from submission_queue
+
+Results are written as JSON to --output, for tracking regressions.
+
+Usage: python benchmarks/load_test.py [--candidates 1 2 4 8] [--think 20] [--output benchmarks/results/load_test.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import pathlib
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+APP_PATH = ROOT / "app.py"
+DEFAULT_OUTPUT = ROOT / "benchmarks" / "results" / "load_test.json"
+RUN_TIMEOUT_SECONDS = 120
+
+
+def server(candidates, correct_rate, workdir, results):
+    """Level process: run ``candidates`` sessions round-robin and put the measurements on ``results``."""
+    import resource
+
+    os.environ["STREAMLIT_LOGGER_LEVEL"] = "error"  # AppTest runs warn about the bare-mode context
+    os.chdir(workdir)
+    sys.path.insert(0, str(ROOT))
+    import submission_queue
+
+    latencies, errors = [], []
+    sessions = {index: take_assessment(index, correct_rate, latencies, errors) for index in range(candidates)}
+    started = time.perf_counter()
+    while sessions:
+        for index, steps in list(sessions.items()):
+            try:
+                next(steps)
+            except StopIteration:
+                del sessions[index]
+            except Exception as exc:  # a failed session is reported, not fatal to the level
+                errors.append(f"candidate {index}: {type(exc).__name__}: {exc}")
+                del sessions[index]
+    wall = time.perf_counter() - started
+    submission_queue.shutdown()
+    # A multiprocessing child joins its children before atexit handlers run, so
+    # the grading pool started by the app has to be stopped (and waited for) here;
+    # RUSAGE_CHILDREN then covers its workers (ru_maxrss: the largest of them)
+    import grading
+
+    workers = len(multiprocessing.active_children())
+    grading.shutdown(wait=True)
+    results.put({
+        "latencies": latencies,
+        "errors": errors,
+        "wall": wall,
+        "writes": submission_queue.stats(),
+        "cache": grading.cache_stats(),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # KB on Linux
+        "workers": workers,
+        "worker_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    })
+
+
+def take_assessment(index, correct_rate, latencies, errors):
+    """
+    Drive one candidate through the whole form, recording each rerun's latency
+    (ms); a generator that yields after every rerun, so sessions can take turns.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    from question_bank import load_question_bank
+
+    bank = load_question_bank()
+    rng = random.Random(index)
+    at = AppTest.from_file(str(APP_PATH), default_timeout=RUN_TIMEOUT_SECONDS)
+
+    def run():
+        started = time.perf_counter()
+        at.run()
+        latencies.append((time.perf_counter() - started) * 1000)
+        if at.exception:
+            errors.append(f"candidate {index}: {at.exception[0].message}")
+
+    run()
+    yield
+    at.text_input(key="student_name").input(f"Load Candidate {index}")
+    run()
+    yield
+    at.text_input(key="student_email").input(f"load{index}@example.com")
+    run()
+    yield
+    form = at.session_state.form_ids
+    for position, question_id in enumerate(form):
+        question = bank.by_id[question_id]
+        right = rng.random() < correct_rate
+        if question.get("type") == "mcq":
+            letters = {option.split(".")[0].strip(): option for option in question["options"]}
+            wrong = [letter for letter in letters if letter not in question["correct_answers"]]
+            chosen = list(question["correct_answers"]) if right or not wrong else [rng.choice(wrong)]
+            if len(question["correct_answers"]) > 1:
+                for letter in chosen:
+                    at.checkbox(key=f"option_{position}_{letters[letter]}").check()
+            else:
+                at.radio(key=f"option_{position}").set_value(letters[chosen[0]])
+            at.button(key=f"submit_mcq_{position}").click()
+        else:
+            at.text_area(key=f"sql_input_{position}").input(question["solution"] if right else "SELECT 1")
+            at.button(key=f"submit_sql_{position}").click()
+        run()
+        yield
+        kind = "mcq" if question.get("type") == "mcq" else "sql"
+        last = position == len(form) - 1
+        at.button(key=f"{'results' if last else 'next'}_{kind}_{position}").click()
+        run()
+        yield
+    if not any("saved" in str(element.value) for element in at.success):
+        errors.append(f"candidate {index}: results page did not save the submission")
+
+
+def run_level(candidates, correct_rate, think):
+    """Run one level in a fresh server process; returns its report."""
+    import numpy as np
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    with tempfile.TemporaryDirectory() as workdir:
+        process = context.Process(target=server, args=(candidates, correct_rate, workdir, results))
+        process.start()
+        report = results.get()
+        process.join()
+
+    reruns = np.array(report["latencies"])
+    writes = report["writes"]
+    reruns_per_s = len(reruns) / report["wall"]
+    return {
+        "candidates": candidates,
+        "reruns": len(reruns),
+        "rerun_ms": {
+            "p50": float(np.percentile(reruns, 50)),
+            "p95": float(np.percentile(reruns, 95)),
+            "p99": float(np.percentile(reruns, 99)),
+            "max": float(reruns.max()),
+        },
+        "wall_s": report["wall"],
+        "reruns_per_s": reruns_per_s,
+        "supported_candidates": reruns_per_s * think,
+        "verdict_cache": report["cache"],
+        "peak_rss_mb": {
+            "server": report["peak_rss_mb"],
+            "worker_max": report["worker_peak_rss_mb"],
+            "workers": report["workers"],
+            "total_bound": report["peak_rss_mb"] + report["workers"] * report["worker_peak_rss_mb"],
+        },
+        "submission_write_ms": {
+            "committed": writes["committed"],
+            "avg_commit": writes["avg_commit_ms"],
+            "max_commit": writes["max_commit_ms"],
+            "avg_submit_to_commit": writes["avg_latency_ms"],
+            "max_submit_to_commit": writes["max_latency_ms"],
+        },
+        "errors": report["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--correct", type=float, default=0.6, help="share of questions answered correctly")
+    parser.add_argument("--think", type=float, default=20.0, help="seconds between a candidate's reruns")
+    parser.add_argument("--output", type=pathlib.Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    levels = []
+    print(f"{'candidates':>10} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'reruns/s':>9} "
+          f"{'supported':>9} {'rss MB':>7} {'all MB':>7} {'write ms':>9} {'errors':>6}")
+    for candidates in args.candidates:
+        level = run_level(candidates, args.correct, args.think)
+        levels.append(level)
+        print(f"{candidates:>10} {level['reruns']:>7} {level['rerun_ms']['p50']:>8.1f} "
+              f"{level['rerun_ms']['p95']:>8.1f} {level['rerun_ms']['p99']:>8.1f} "
+              f"{level['reruns_per_s']:>9.1f} {level['supported_candidates']:>9.0f} "
+              f"{level['peak_rss_mb']['server']:>7.0f} {level['peak_rss_mb']['total_bound']:>7.0f} "
+              f"{level['submission_write_ms']['avg_submit_to_commit']:>9.1f} "
+              f"{len(level['errors']):>6}")
+    print(f"supported: candidates one server keeps up with at one rerun per {args.think:.0f} s each")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "correct_rate": args.correct,
+        "think_seconds": args.think,
+        "topology": "one app process per level; its sessions share the grading pool, caches and write "
+                    "queue and take turns one rerun at a time (round-robin)",
+        "levels": levels,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
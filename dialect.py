@@ -0,0 +1,257 @@
+"""
+T-SQL to SQLite translation for the grading fixture.
+
+Reference solutions (and the candidates answering them) are written in T-SQL,
+while the fixture is SQLite. ``to_sqlite`` rewrites the T-SQL constructs the
+question bank relies on:
+
+- ``SELECT TOP n ...``               -> ``SELECT ... LIMIT n`` (per subquery)
+- ``DATEADD(unit, n, expr)``         -> ``date(expr, (n) || ' <unit>s')``
+- ``CAST(expr AS DATE/DATETIME)``    -> ``date(expr)`` / ``datetime(expr)``
+- ``YEAR/MONTH/DAY(expr)``           -> ``CAST(strftime(...) AS INTEGER)``
+- ``a + 'text'``                     -> ``a || 'text'``
+- ``GETDATE()``, ``ISNULL``, ``LEN`` -> SQLite equivalents
+- ``'20150101'`` date literals       -> ``'2015-01-01'``
+- ``'10000'`` numeric literals       -> ``10000`` (T-SQL converts implicitly)
+- bare ``ORDER BY`` names that T-SQL resolves through a qualified SELECT
+  column (``SELECT orders.orderid ... ORDER BY orderid``) are qualified
+
+Translations are memoized, so each distinct query is rewritten at most once
+per process. The rewrite recurses once per parenthesis level, so a query
+nested deeper than MAX_NESTING_DEPTH is rejected with QueryTooComplex before
+it can reach Python's recursion limit.
+"""
+import functools
+import re
+
+from sql_lexer import tokenize
+
+_DATE_LITERAL = re.compile(r"^(\d{4})(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])$")
+_NUMERIC_LITERAL = re.compile(r"^-?\d+(\.\d+)?$")
+
+DATE_PARTS = {
+    "year": ("years", 1), "yy": ("years", 1), "yyyy": ("years", 1),
+    "quarter": ("months", 3), "qq": ("months", 3), "q": ("months", 3),
+    "month": ("months", 1), "mm": ("months", 1), "m": ("months", 1),
+    "week": ("days", 7), "wk": ("days", 7), "ww": ("days", 7),
+    "day": ("days", 1), "dd": ("days", 1), "d": ("days", 1),
+    "hour": ("hours", 1), "hh": ("hours", 1),
+    "minute": ("minutes", 1), "mi": ("minutes", 1), "n": ("minutes", 1),
+    "second": ("seconds", 1), "ss": ("seconds", 1), "s": ("seconds", 1),
+}
+EXTRACT_FORMATS = {"YEAR": "%Y", "MONTH": "%m", "DAY": "%d"}
+RENAMED_FUNCTIONS = {"ISNULL": "IFNULL", "LEN": "LENGTH"}
+# Calls rewritten from their translated arguments (none of them takes a bare subquery)
+CALL_REWRITES = frozenset({"DATEADD", "GETDATE", *EXTRACT_FORMATS})
+MAX_NESTING_DEPTH = 200  # parentheses; each level costs up to two stack frames
+SQL_KEYWORDS = frozenset({
+    "ASC", "DESC", "NULLS", "FIRST", "LAST", "CASE", "WHEN", "THEN", "ELSE",
+    "END", "IS", "NULL", "NOT", "AND", "OR", "LIMIT", "OFFSET",
+})
+
+
+class QueryTooComplex(ValueError):
+    """Raised for a query nested deeper than MAX_NESTING_DEPTH."""
+
+
+@functools.lru_cache(maxsize=4096)
+def to_sqlite(sql):
+    """Translate a T-SQL query to SQLite (memoized per query text)."""
+    tokens = tokenize(sql.strip().rstrip(";").rstrip())
+    depth = 0
+    for _, text in tokens:
+        if text == "(":
+            depth += 1
+            if depth > MAX_NESTING_DEPTH:
+                raise QueryTooComplex(f"query is nested more than {MAX_NESTING_DEPTH} parentheses deep")
+        elif text == ")":
+            depth -= 1
+    return _translate(tokens)
+
+
+# ==========================
+# Token helpers
+# ==========================
+def _next_significant(tokens, i):
+    while i < len(tokens) and tokens[i][0] in ("ws", "comment"):
+        i += 1
+    return i
+
+
+def _prev_significant(tokens, i):
+    while i >= 0 and tokens[i][0] in ("ws", "comment"):
+        i -= 1
+    return i
+
+
+def _matching_paren(tokens, i):
+    depth = 0
+    for j in range(i, len(tokens)):
+        if tokens[j][1] == "(":
+            depth += 1
+        elif tokens[j][1] == ")":
+            depth -= 1
+            if depth == 0:
+                return j
+    return len(tokens)
+
+
+def _split_top_level(tokens, separator=","):
+    parts, current, depth = [], [], 0
+    for kind, text in tokens:
+        if text == "(":
+            depth += 1
+        elif text == ")":
+            depth -= 1
+        if depth == 0 and text == separator:
+            parts.append(current)
+            current = []
+        else:
+            current.append((kind, text))
+    parts.append(current)
+    return parts
+
+
+def _significant(tokens):
+    return [t for t in tokens if t[0] not in ("ws", "comment")]
+
+
+# ==========================
+# Rewrites
+# ==========================
+def _rewrite_literal(text):
+    if text[0] in "Nn":
+        text = text[1:]
+    body = text[1:-1]
+    date_match = _DATE_LITERAL.match(body)
+    if date_match:
+        return "'{}-{}-{}'".format(*date_match.groups())
+    if _NUMERIC_LITERAL.match(body):
+        return body
+    return text
+
+
+def _rewrite_call(name, args):
+    """Rewrite a function call whose arguments are already translated; None keeps it."""
+    if name == "DATEADD" and len(args) == 3:
+        unit, factor = DATE_PARTS.get(args[0].strip().lower().strip("'"), (None, 1))
+        if unit is None:
+            return None
+        amount = f"({args[1].strip()})" if factor == 1 else f"(({args[1].strip()}) * {factor})"
+        function = "datetime" if unit in ("hours", "minutes", "seconds") else "date"
+        return f"{function}({args[2].strip()}, {amount} || ' {unit}')"
+    if name in EXTRACT_FORMATS and len(args) == 1:
+        return f"CAST(strftime('{EXTRACT_FORMATS[name]}', {args[0].strip()}) AS INTEGER)"
+    if name == "GETDATE" and not "".join(args).strip():
+        return "datetime('now')"
+    return None
+
+
+def _rewrite_cast(inner):
+    """CAST(expr AS DATE) -> date(expr); other casts keep SQLite-compatible types; None without AS."""
+    significant = _significant(inner)
+    as_positions = [i for i, t in enumerate(inner) if t[0] == "word" and t[1].upper() == "AS"]
+    if not as_positions or not significant:
+        return None
+    split = as_positions[-1]
+    expression = _translate(inner[:split]).strip()
+    target = "".join(t[1] for t in _significant(inner[split + 1:])).upper()
+    base = target.split("(")[0]
+    if base == "DATE":
+        return f"date({expression})"
+    if base in ("DATETIME", "DATETIME2", "SMALLDATETIME"):
+        return f"datetime({expression})"
+    if base in ("VARCHAR", "NVARCHAR", "CHAR", "NCHAR"):
+        return f"CAST({expression} AS TEXT)"
+    if base in ("DECIMAL", "NUMERIC", "MONEY", "FLOAT"):
+        return f"CAST({expression} AS REAL)"
+    return f"CAST({expression} AS {target})"
+
+
+def _qualified_select_columns(tokens):
+    """Map bare column name -> 'table.column' for unaliased qualified SELECT items."""
+    significant = _significant(tokens)
+    words = [t[1].upper() for t in significant]
+    if not words or words[0] != "SELECT":
+        return {}
+    depth, end = 0, len(significant)
+    for i, (_, text) in enumerate(significant):
+        if text == "(":
+            depth += 1
+        elif text == ")":
+            depth -= 1
+        elif depth == 0 and text.upper() == "FROM":
+            end = i
+            break
+    mapping, aliases = {}, set()
+    for item in _split_top_level(significant[1:end]):
+        texts = [t[1] for t in item]
+        if len(texts) >= 2 and texts[-2].upper() == "AS":
+            aliases.add(texts[-1].lower())
+        if len(texts) == 3 and texts[1] == "." and item[0][0] == item[2][0] == "word":
+            mapping.setdefault(texts[2].lower(), f"{texts[0]}.{texts[2]}")
+    return {name: qualified for name, qualified in mapping.items() if name not in aliases}
+
+
+def _translate(tokens):
+    out = []
+    limit = None
+    qualify = _qualified_select_columns(tokens)
+    in_order_by = False
+    i = 0
+    while i < len(tokens):
+        kind, text = tokens[i]
+        upper = text.upper()
+        if kind == "word":
+            j = _next_significant(tokens, i + 1)
+            nxt = tokens[j][1] if j < len(tokens) else ""
+            prev = _prev_significant(tokens, i - 1)
+            prev_text = tokens[prev][1].upper() if prev >= 0 else ""
+            if upper == "TOP" and prev_text in ("SELECT", "DISTINCT", "ALL"):
+                # TOP n / TOP (n) becomes a LIMIT at the end of this SELECT
+                if j < len(tokens) and tokens[j][0] == "number":
+                    limit, i = tokens[j][1], j + 1
+                    continue
+                if nxt == "(":
+                    k = _matching_paren(tokens, j)
+                    limit, i = _translate(tokens[j + 1:k]).strip(), k + 1
+                    continue
+            if nxt == "(" and prev_text != ".":
+                k = _matching_paren(tokens, j)
+                inner = tokens[j + 1:k]
+                call = RENAMED_FUNCTIONS.get(upper, text) + "".join(t[1] for t in tokens[i + 1:j])
+                # Each argument is translated once: translating it again for a
+                # fallback would double the work at every nesting level
+                if upper == "CAST":
+                    rewritten = _rewrite_cast(inner) or f"{call}({_translate(inner)})"
+                elif upper in CALL_REWRITES:
+                    args = [_translate(arg) for arg in _split_top_level(inner)]
+                    rewritten = _rewrite_call(upper, args) or f"{call}({','.join(args)})"
+                else:
+                    rewritten = f"{call}({_translate(inner)})"
+                out.append(rewritten)
+                i = k + 1
+                continue
+            if upper == "BY" and prev_text == "ORDER":
+                in_order_by = True
+            elif (in_order_by and text.lower() in qualify and prev_text != "."
+                    and nxt != "." and upper not in SQL_KEYWORDS):
+                text = qualify[text.lower()]
+        elif text == "(":
+            k = _matching_paren(tokens, i)
+            out.append(f"({_translate(tokens[i + 1:k])})")
+            i = k + 1
+            continue
+        elif kind == "string":
+            text = _rewrite_literal(text)
+        elif text == "+":
+            prev = _prev_significant(tokens, i - 1)
+            j = _next_significant(tokens, i + 1)
+            if (prev >= 0 and tokens[prev][0] == "string") or (j < len(tokens) and tokens[j][0] == "string"):
+                text = "||"
+        out.append(text)
+        i += 1
+    result = "".join(out)
+    if limit is not None:
+        result = f"{result.rstrip()} LIMIT {limit}"
+    return result
@@ -0,0 +1,112 @@
+"""
+Submission exports for the admin dashboard.
+
+Exports are built only when a download is requested (the dashboard passes a
+callable to ``st.download_button``). Each one is streamed from the
+submissions store to a file in ``submissions/exports``, a batch of rows at a
+time, without building a DataFrame; Excel is written with openpyxl in
+write-only mode. Finished files are named after the store version and the
+question ids, so repeated downloads reuse them until new submissions arrive;
+older files of the same kind are removed.
+
+- CSV:   the original record values (as the per-attempt files had them)
+- Excel: answers as True/False, empty where the question was not served
+
+Building is streamed, serving is not: ``st.download_button`` keeps the data
+it sends in memory (a file object is read in full), so ``export_bytes``
+returns the whole file and a download costs the export's size in server
+memory while it is served. What this module saves is the DataFrame, the
+rebuild on every rerun and the rebuild for repeated downloads.
+"""
+import csv
+import hashlib
+import os
+import threading
+
+import answer_matrix
+import submission_store
+
+EXPORT_DIR = os.path.join(submission_store.SUBMISSIONS_DIR, "exports")
+BATCH_ROWS = 1000
+
+_LOCK = threading.Lock()
+
+
+def header(question_ids):
+    return list(submission_store.COLUMNS) + [answer_matrix.answer_column(qid) for qid in question_ids]
+
+
+def write_csv(path, question_ids, conn):
+    fields = header(question_ids)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(submission_store.iter_records(BATCH_ROWS, conn))
+
+
+def write_excel(path, question_ids, conn):
+    import openpyxl
+
+    fields = header(question_ids)
+    answer_fields = fields[len(submission_store.COLUMNS):]
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Submissions")
+    sheet.append(fields)
+    for record in submission_store.iter_records(BATCH_ROWS, conn):
+        row = [record.get(field) for field in submission_store.COLUMNS]
+        for field in answer_fields:
+            value = record.get(field)
+            row.append(None if value in (None, "") else str(value).strip().lower() == "true")
+        sheet.append(row)
+    workbook.save(path)
+
+
+WRITERS = {"csv": write_csv, "xlsx": write_excel}
+
+
+def export_path(kind, question_ids, conn=None):
+    """Path of the export for the current store version (it may not exist yet)."""
+    version, _ = submission_store.store_version(conn)
+    ids_digest = hashlib.sha1(",".join(map(str, question_ids)).encode()).hexdigest()[:8]
+    return os.path.join(EXPORT_DIR, f"submissions_v{version}_{ids_digest}.{kind}")
+
+
+def build_export(kind, question_ids):
+    """Return the path of an up-to-date export of ``kind`` ("csv" or "xlsx"), building it if needed."""
+    question_ids = tuple(question_ids)
+    conn = submission_store.connect()
+    try:
+        with _LOCK:
+            # One read transaction: the version and the rows come from the same snapshot
+            conn.execute("BEGIN")
+            path = export_path(kind, question_ids, conn)
+            if os.path.exists(path):
+                return path
+            os.makedirs(EXPORT_DIR, exist_ok=True)
+            partial = f"{path}.{os.getpid()}.tmp"
+            try:
+                WRITERS[kind](partial, question_ids, conn)
+                os.replace(partial, path)  # atomic, so other processes never see a partial file
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+            _remove_stale(kind, path)
+            return path
+    finally:
+        conn.close()
+
+
+def _remove_stale(kind, current):
+    for name in os.listdir(EXPORT_DIR):
+        stale = os.path.join(EXPORT_DIR, name)
+        if name.endswith(f".{kind}") and stale != current:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass  # already removed by another process
+
+
+def export_bytes(kind, question_ids):
+    """Contents of an up-to-date export, read in full (``st.download_button`` needs the bytes)."""
+    with open(build_export(kind, question_ids), "rb") as f:
+        return f.read()
@@ -0,0 +1,101 @@
+"""
+Assessment form assembly.
+
+A form is FORM_SQL_QUESTIONS SQL plus FORM_POWERBI_QUESTIONS PowerBI
+questions, in a shuffled order that depends only on the user's name, so a
+candidate who reloads the page gets the same form back.
+
+Each question type is split once per bank into complexity buckets (SQL levels
+from ``assign_complexity_level``, PowerBI easy/medium/hard). A form draws
+from every bucket in proportion to its size (largest remainders decide the
+rounding), so each candidate gets the bank's mix of easy and hard questions
+rather than whatever a plain shuffle happens to produce.
+
+Every form is drawn with its own ``random.Random`` seeded from a hash of the
+name; nothing touches the module-global RNG, so sessions assembling forms on
+different threads at the same time cannot disturb each other. The drawn
+question ids are memoized per bank version and name hash: a repeat costs one
+cache lookup plus building the list of questions.
+"""
+import collections
+import functools
+import hashlib
+import random
+import threading
+
+import question_bank
+
+FORM_SQL_QUESTIONS = 20
+FORM_POWERBI_QUESTIONS = 20
+FORM_CACHE_SIZE = 10000
+
+# Questions of one type grouped by complexity level, in bank order
+Buckets = collections.namedtuple("Buckets", ["levels", "question_ids"])
+
+_LOCK = threading.Lock()
+_BUCKETS = {}  # bank version -> (SQL buckets, PowerBI buckets)
+
+
+def user_seed(user_name):
+    """Stable seed for a user's form (case and surrounding spaces ignored)."""
+    return int(hashlib.md5(user_name.strip().lower().encode()).hexdigest(), 16)
+
+
+def complexity_buckets(questions):
+    """Buckets of question ids per complexity level (unknown levels form their own bucket)."""
+    groups = {}
+    for question in questions:
+        groups.setdefault(question_bank.complexity_level(question), []).append(question["id"])
+    levels = sorted(groups, key=lambda level: (level is None, level))
+    return Buckets(tuple(levels), tuple(tuple(groups[level]) for level in levels))
+
+
+def allocate(sizes, count):
+    """Split ``count`` draws across buckets in proportion to their sizes (largest remainder)."""
+    total = sum(sizes)
+    count = min(count, total)
+    if not total:
+        return [0] * len(sizes)
+    quotas = [size * count / total for size in sizes]
+    counts = [int(quota) for quota in quotas]
+    by_remainder = sorted(range(len(sizes)), key=lambda i: (counts[i] - quotas[i], i))
+    for i in by_remainder[:count - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def draw(rng, buckets, count):
+    """Stratified sample of ``count`` question ids."""
+    counts = allocate([len(ids) for ids in buckets.question_ids], count)
+    drawn = []
+    for ids, n in zip(buckets.question_ids, counts):
+        drawn += rng.sample(ids, n)
+    return drawn
+
+
+def _bank_buckets(bank):
+    with _LOCK:
+        buckets = _BUCKETS.get(bank.version)
+        if buckets is None:
+            buckets = _BUCKETS[bank.version] = (complexity_buckets(bank.sql), complexity_buckets(bank.powerbi))
+        return buckets
+
+
+@functools.lru_cache(maxsize=FORM_CACHE_SIZE)
+def _form_ids(version, seed, sql_count, powerbi_count):
+    sql_buckets, powerbi_buckets = _BUCKETS[version]
+    rng = random.Random(seed)
+    ids = draw(rng, sql_buckets, sql_count) + draw(rng, powerbi_buckets, powerbi_count)
+    rng.shuffle(ids)
+    return tuple(ids)
+
+
+def form_ids(user_name, bank, sql_count=FORM_SQL_QUESTIONS, powerbi_count=FORM_POWERBI_QUESTIONS):
+    """The question ids of a user's form, in presentation order (memoized)."""
+    _bank_buckets(bank)
+    return _form_ids(bank.version, user_seed(user_name), sql_count, powerbi_count)
+
+
+def assemble_form(user_name, bank, sql_count=FORM_SQL_QUESTIONS, powerbi_count=FORM_POWERBI_QUESTIONS):
+    """A user's form as a list of question mappings."""
+    return [bank.by_id[question_id] for question_id in form_ids(user_name, bank, sql_count, powerbi_count)]
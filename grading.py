@@ -0,0 +1,437 @@
+"""
+Execution-based grading of SQL answers.
+
+Candidate and reference queries are both run against the in-process Northwind
+fixture (see ``northwind.py``) and their result sets are compared, so any query
+that returns the right rows is accepted regardless of how it is written.
+Every reference solution is reduced to a fingerprint once per process; only the
+digests are kept, so grading a submission is one query run, one hash and one
+comparison. Both sides are translated from T-SQL first (see ``dialect.py``).
+
+Candidate queries run in a pool of worker processes, each holding a warm
+read-only copy of the fixture, under a wall-clock timeout, a row cap and a
+memory cap. A runaway query (e.g. an accidental cartesian join) costs one
+worker a few seconds instead of stalling the Streamlit server.
+
+Accepted solution texts (the reference plus any ``alternate_solutions``) are
+indexed once by ``query_key``; a submission that is one of them up to
+whitespace, comments and the case of keywords and names is correct after a
+single set lookup, without running anything. Their canonical forms
+(``normalize_sql``) are indexed too, for the text comparison used when a
+reference cannot run in the fixture.
+
+Verdicts are kept in a bounded process-wide LRU cache shared by all sessions,
+keyed by question-bank version, question id and ``query_key``, so the many
+identical submissions in a cohort skip execution entirely. The key only drops
+what cannot change a result; the canonical form, which also sorts and renames,
+is never used to reuse a verdict.
+"""
+import atexit
+import collections
+import concurrent.futures
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import types
+import warnings
+
+import dialect
+import northwind
+import sql_lexer
+from sql_lexer import normalize_sql
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+_LOCK = threading.Lock()
+_CONNECTION = None
+_REFERENCE_FINGERPRINTS = {}
+_REFERENCE_ORDER_KEYS = {}  # question id -> canonical positions of the ORDER BY columns, or None
+_SCHEMA = None
+_POOL = None
+_BANK_VERSION = None
+_SOLUTION_INDEX = types.MappingProxyType({})
+_SOLUTION_KEYS = types.MappingProxyType({})
+
+FLOAT_PRECISION = 4
+
+# Sandbox limits for candidate queries
+WORKER_COUNT = min(4, os.cpu_count() or 1)
+QUERY_TIMEOUT_SECONDS = 3.0  # execution time, enforced in the worker
+QUEUE_WAIT_SECONDS = 30.0  # longest wait for a free worker before grading is reported unavailable
+MAX_RESULT_ROWS = 10000
+WORKER_MEMORY_BYTES = 512 * 1024 * 1024
+SQLITE_HEAP_BYTES = 128 * 1024 * 1024
+PROGRESS_INTERVAL = 10000  # SQLite VM steps between deadline checks
+
+VERDICT_CACHE_SIZE = 4096
+
+
+class ResultTooLarge(Exception):
+    """Raised when a query returns more than MAX_RESULT_ROWS rows."""
+
+
+class GradingUnavailable(Exception):
+    """Raised when no worker graded a query in time (a busy or broken pool); the answer should be resubmitted."""
+
+
+class LRUCache:
+    """Thread-safe bounded LRU mapping with hit/miss/eviction counters."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+VERDICT_CACHE = LRUCache(VERDICT_CACHE_SIZE)
+
+
+def query_key(sql):
+    """
+    Exact key of a query: its tokens without whitespace, comments and trailing
+    semicolons, with keywords and unquoted names lowercased (SQLite ignores
+    their case). Literals and quoted names are kept as written, so two queries
+    with the same key run the same statement.
+    """
+    return "\x1f".join(text.lower() if kind == "word" else text
+                       for kind, text in sql_lexer.tokenize(sql.strip().rstrip(";").rstrip())
+                       if kind not in ("ws", "comment"))
+
+
+def build_solution_index(questions, key=normalize_sql):
+    """Frozen mapping of question id -> frozenset of the ``key`` of each accepted solution."""
+    return types.MappingProxyType({
+        q["id"]: frozenset(key(s) for s in [q["solution"], *q.get("alternate_solutions", ())])
+        for q in questions
+        if "solution" in q
+    })
+
+
+def accepted_forms(question_id):
+    """Canonical forms of a question's accepted solutions, for the text comparison fallback."""
+    return _SOLUTION_INDEX.get(question_id, frozenset())
+
+
+def accepted_keys(question_id):
+    """``query_key`` of each accepted solution; a submission with one of them is correct without execution."""
+    return _SOLUTION_KEYS.get(question_id, frozenset())
+
+
+def bank_version(questions):
+    """Short digest of the SQL question bank; changes whenever a solution does."""
+    digest = hashlib.sha1()
+    for question in questions:
+        if "solution" in question:
+            accepted = [question["solution"], *question.get("alternate_solutions", ())]
+            digest.update(f"{question['id']}\x1f{chr(31).join(accepted)}\x1e".encode())
+    return digest.hexdigest()[:12]
+
+
+def prime(questions):
+    """Build the fixture and fingerprint every reference solution (idempotent)."""
+    global _CONNECTION, _SCHEMA, _BANK_VERSION, _SOLUTION_INDEX, _SOLUTION_KEYS
+    with _LOCK:
+        if _SCHEMA is None:
+            # Plain tuples/lists, so it can be sent to spawned workers
+            _SCHEMA = northwind.collect_schema(questions)
+            _BANK_VERSION = bank_version(questions)
+            _SOLUTION_INDEX = build_solution_index(questions)
+            _SOLUTION_KEYS = build_solution_index(questions, query_key)
+        pending = [q for q in questions if "solution" in q and q["id"] not in _REFERENCE_FINGERPRINTS]
+        if not pending:
+            return
+        _CONNECTION = northwind.build_database(_SCHEMA)
+        _CONNECTION.execute("PRAGMA query_only = ON")
+        try:
+            for question in pending:
+                try:
+                    columns, rows = run_query(question["solution"])
+                except sqlite3.Error:
+                    # Not executable in the fixture dialect; callers fall back to text comparison
+                    _REFERENCE_FINGERPRINTS[question["id"]] = None
+                    continue
+                order_keys = reference_order_keys(question["solution"], columns, rows)
+                _REFERENCE_ORDER_KEYS[question["id"]] = order_keys
+                _REFERENCE_FINGERPRINTS[question["id"]] = fingerprint(columns, rows, order_keys)
+                for alternate in question.get("alternate_solutions", ()):
+                    try:
+                        matches = _query_fingerprint(alternate, order_keys) == _REFERENCE_FINGERPRINTS[question["id"]]
+                    except (sqlite3.Error, ResultTooLarge) as exc:
+                        warnings.warn(f"Q{question['id']}: alternate solution does not run in the fixture: {exc}")
+                        continue
+                    if not matches:
+                        warnings.warn(f"Q{question['id']}: alternate solution does not match the reference result")
+        finally:
+            # Reference solutions are trusted and run once; candidates run in the pool
+            _CONNECTION.close()
+            _CONNECTION = None
+
+
+def run_query(sql):
+    """Translate and execute one statement against the fixture; return (columns, rows)."""
+    if _CONNECTION is None:
+        raise RuntimeError("grading.prime() must be called before running queries")
+    cursor = _CONNECTION.execute(dialect.to_sqlite(sql))
+    columns = [d[0] for d in cursor.description or ()]
+    rows = cursor.fetchmany(MAX_RESULT_ROWS + 1)
+    if len(rows) > MAX_RESULT_ROWS:
+        raise ResultTooLarge(f"query returned more than {MAX_RESULT_ROWS} rows")
+    return columns, rows
+
+
+def normalize_value(value):
+    """Make values from differently written queries comparable."""
+    if isinstance(value, float):
+        value = round(value, FLOAT_PRECISION)
+        if value.is_integer():
+            return int(value)
+    return value
+
+
+def _canonical_columns(rows, width):
+    """Rows as value reprs, and the column order given by each column's (sorted) content."""
+    rows = [tuple(repr(normalize_value(v)) for v in row) for row in rows]
+    column_keys = [hashlib.sha1("\x1f".join(sorted(row[i] for row in rows)).encode()).digest() for i in range(width)]
+    return rows, sorted(range(width), key=column_keys.__getitem__)
+
+
+def fingerprint(columns, rows, order_keys=None):
+    """
+    Canonical digest of a result set.
+    - Columns are put in a canonical order by their content, so SELECT-list
+      order and the aliases chosen do not matter
+    - Row order is ignored, except that with ``order_keys`` (canonical
+      positions of the reference's ORDER BY columns) the sequence of those
+      columns' values must match too; rows that tie on them may come in any
+      order
+    """
+    width = len(columns)
+    rows, permutation = _canonical_columns(rows, width)
+    lines = sorted("\x1f".join(row[i] for i in permutation) for row in rows)
+    digest = hashlib.sha1(f"{width}:{len(lines)}:{order_keys}".encode())
+    for line in lines:
+        digest.update(line.encode())
+        digest.update(b"\x1e")
+    if order_keys is not None:
+        keys = [permutation[k] for k in order_keys if k < width]
+        for row in rows:
+            digest.update("\x1f".join(row[i] for i in keys).encode())
+            digest.update(b"\x1d")
+    return digest.hexdigest()
+
+
+def order_by_terms(sql):
+    """Terms of the top-level ORDER BY of ``sql`` (token lists, ASC/DESC dropped), or None."""
+    tokens = sql_lexer.lex(sql)
+    depth, start = 0, None
+    for i, token in enumerate(tokens):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0 and token == "order" and i + 1 < len(tokens) and tokens[i + 1] == "by":
+            start = i + 2
+    if start is None:
+        return None
+    terms, current, depth = [], [], 0
+    for token in tokens[start:]:
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        if depth == 0 and token in ("limit", "offset", "fetch", "for"):
+            break
+        if depth == 0 and token == ",":
+            terms.append(current)
+            current = []
+        elif depth > 0 or token not in ("asc", "desc"):
+            current.append(token)
+    terms.append(current)
+    return terms
+
+
+def reference_order_keys(sql, columns, rows):
+    """
+    Canonical positions of the result columns the reference's ORDER BY sorts
+    on; None without ORDER BY. A term that is not a result column (by name
+    or position) makes every column a key, i.e. the whole row order counts.
+    """
+    terms = order_by_terms(sql)
+    if terms is None:
+        return None
+    width = len(columns)
+    _, permutation = _canonical_columns(rows, width)
+    names = [column.lower() for column in columns]
+    indices = []
+    for term in terms:
+        if len(term) == 1 and term[0].isdigit() and 1 <= int(term[0]) <= width:
+            indices.append(int(term[0]) - 1)
+        elif term and term[-1] in names and (len(term) == 1 or (len(term) == 3 and term[1] == ".")):
+            indices.append(names.index(term[-1]))
+        else:
+            return tuple(range(width))
+    return tuple(permutation.index(i) for i in indices)
+
+
+def _query_fingerprint(sql, order_keys):
+    columns, rows = run_query(sql)
+    return fingerprint(columns, rows, order_keys)
+
+
+# ==========================
+# Sandboxed worker pool
+# ==========================
+def _init_worker(schema):
+    """Pool initializer: cap memory and build this worker's read-only fixture."""
+    global _CONNECTION
+    if resource is not None:
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (WORKER_MEMORY_BYTES, WORKER_MEMORY_BYTES))
+        except (ValueError, OSError):
+            pass  # limit not supported or above the hard limit
+    _CONNECTION = northwind.build_database(schema)
+    _CONNECTION.execute(f"PRAGMA hard_heap_limit = {SQLITE_HEAP_BYTES}")
+    _CONNECTION.execute("PRAGMA query_only = ON")
+
+
+def _worker_fingerprint(sql, order_keys, timeout):
+    """
+    Run a candidate query in a worker under the timeout and row cap; None when
+    it does not run. Any exception counts as that (e.g. RecursionError from
+    translating deeply nested input), so none reaches the app.
+    """
+    deadline = time.monotonic() + timeout
+    _CONNECTION.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_INTERVAL)
+    try:
+        return _query_fingerprint(sql, order_keys)
+    except Exception:
+        return None
+    finally:
+        _CONNECTION.set_progress_handler(None, 0)
+
+
+def _get_pool():
+    global _POOL
+    with _LOCK:
+        if _POOL is None:
+            if _SCHEMA is None:
+                raise RuntimeError("grading.prime() must be called before grading")
+            _POOL = concurrent.futures.ProcessPoolExecutor(
+                max_workers=WORKER_COUNT,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(_SCHEMA,),
+            )
+        return _POOL
+
+
+def _reset_pool(broken):
+    global _POOL
+    with _LOCK:
+        if _POOL is broken:
+            _POOL = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown(wait=False):
+    """Stop the worker pool (registered with atexit); ``wait`` until its processes exit."""
+    global _POOL
+    with _LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+atexit.register(shutdown)
+
+
+def cache_stats():
+    """Hit/miss/eviction counters of the shared verdict cache."""
+    return VERDICT_CACHE.stats()
+
+
+def grade_sql(question, user_sql):
+    """
+    Grade a candidate query by comparing its result fingerprint with the
+    reference. Returns True/False, or None when the reference itself cannot be
+    executed in the fixture (the caller should then fall back to text comparison).
+    Queries that fail, time out or exceed the row/memory caps are incorrect.
+    Raises GradingUnavailable when no worker became free in time; nothing is
+    cached then, and the same answer can be graded again.
+
+    Accepted solutions are recognized by ``query_key`` without execution, and
+    verdicts are looked up in and stored to the shared cache under it.
+    """
+    query = query_key(user_sql)
+    if query in accepted_keys(question["id"]):
+        return True
+    expected = _REFERENCE_FINGERPRINTS.get(question["id"])
+    if expected is None:
+        return None
+    key = (_BANK_VERSION, question["id"], query)
+    verdict = VERDICT_CACHE.get(key)
+    if verdict is not None:
+        return verdict
+    order_keys = _REFERENCE_ORDER_KEYS.get(question["id"])
+    for _ in range(2):
+        pool = _get_pool()
+        try:
+            future = pool.submit(_worker_fingerprint, user_sql, order_keys, QUERY_TIMEOUT_SECONDS)
+            # The worker times the execution itself; this bounds the wait for a free one
+            actual = future.result(timeout=QUEUE_WAIT_SECONDS + QUERY_TIMEOUT_SECONDS)
+            break
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise GradingUnavailable(f"no grading worker was free within {QUEUE_WAIT_SECONDS:.0f} s") from None
+        except concurrent.futures.process.BrokenProcessPool:
+            # A worker died (e.g. hit the memory cap), possibly running another
+            # session's query: retry once on a fresh pool
+            _reset_pool(pool)
+    else:
+        # It broke a fresh pool as well, so it is this query that does not run
+        return False
+    verdict = actual == expected
+    VERDICT_CACHE.put(key, verdict)
+    return verdict
@@ -0,0 +1,139 @@
+"""
+Item analysis over the answer matrix (see ``answer_matrix.py``).
+
+- ``item_statistics``: per question, how often it was served, its p-value
+  (share of candidates served it who answered correctly) and its
+  point-biserial discrimination. Each candidate sees a different subset of the
+  bank, so the criterion is the candidate's rest score: the share correct of
+  the *other* questions they were served.
+- ``option_rates``: for multiple-choice questions, the share of candidates
+  who selected each option (among those whose selection was recorded).
+- ``form_reliability``: KR-20 per generated form (candidates served exactly
+  the same questions), for forms taken by at least ``MIN_FORM_CANDIDATES``.
+- ``complexity_summary``: the statistics per assigned complexity level, to
+  check that ``assign_complexity_level`` (and the PowerBI easy/medium/hard
+  labels) track observed difficulty.
+
+Everything is computed with NumPy over row blocks of the packed matrix.
+"""
+import numpy as np
+import pandas as pd
+
+import answer_matrix
+from question_bank import complexity_level
+
+MIN_FORM_CANDIDATES = 5
+
+
+def item_statistics(matrix, questions):
+    """DataFrame with one row per question id of the matrix."""
+    count = len(matrix.question_ids)
+    served_n = np.zeros(count, dtype=np.int64)
+    correct_n = np.zeros(count, dtype=np.int64)
+    n = np.zeros(count, dtype=np.int64)
+    sum_x = np.zeros(count)
+    sum_y = np.zeros(count)
+    sum_yy = np.zeros(count)
+    sum_xy = np.zeros(count)
+    for _, correct, served in answer_matrix.iter_blocks(matrix):
+        served_n += served.sum(axis=0)
+        correct_n += correct.sum(axis=0)
+        totals_served = served.sum(axis=1, keepdims=True)
+        totals_correct = correct.sum(axis=1, keepdims=True)
+        # Rest score of each candidate with respect to each item they were served
+        valid = served & (totals_served > 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rest = np.where(valid, (totals_correct - correct) / (totals_served - 1), 0.0)
+        x = correct & valid
+        n += valid.sum(axis=0)
+        sum_x += x.sum(axis=0)
+        sum_y += rest.sum(axis=0)
+        sum_yy += (rest * rest).sum(axis=0)
+        sum_xy += (rest * x).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p_value = np.where(served_n > 0, correct_n / served_n, np.nan)
+        # Pearson correlation of a 0/1 item with the rest score (sum of x^2 == sum of x)
+        numerator = n * sum_xy - sum_x * sum_y
+        denominator = np.sqrt((n * sum_x - sum_x ** 2) * (n * sum_yy - sum_y ** 2))
+        point_biserial = np.where(denominator > 0, numerator / denominator, np.nan)
+    by_id = {q["id"]: q for q in questions}
+    return pd.DataFrame({
+        "question_id": matrix.question_ids,
+        "type": [by_id.get(qid, {}).get("type", "sql") for qid in matrix.question_ids],
+        "complexity": [complexity_level(by_id.get(qid, {})) for qid in matrix.question_ids],
+        "served": served_n,
+        "p_value": p_value,
+        "point_biserial": point_biserial,
+    })
+
+
+def option_rates(matrix, questions):
+    """DataFrame of (question_id, option, is_correct, selected, rate, served) per MCQ option."""
+    by_id = {q["id"]: q for q in questions}
+    positions = {qid: i for i, qid in enumerate(matrix.question_ids)}
+    served_n, _ = answer_matrix.question_totals(matrix)
+    rows = []
+    for j, question_id in enumerate(matrix.option_ids):
+        question = by_id[question_id]
+        masks = matrix.selected[:, j]
+        served = served_n[positions[question_id]] if question_id in positions else 0
+        answered = int(np.count_nonzero(masks))
+        for bit, option in enumerate(question["options"]):
+            letter = option.split(".")[0].strip()
+            selected = int(np.count_nonzero(masks & (1 << bit)))
+            rows.append({
+                "question_id": question_id,
+                "option": letter,
+                "is_correct": letter in question["correct_answers"],
+                "selected": selected,
+                "rate": selected / answered if answered else np.nan,
+                "served": served,
+            })
+    return pd.DataFrame(rows, columns=["question_id", "option", "is_correct", "selected", "rate", "served"])
+
+
+def form_reliability(matrix, min_candidates=MIN_FORM_CANDIDATES):
+    """KR-20 per form taken by at least ``min_candidates`` candidates."""
+    rows = []
+    if len(matrix.served):
+        forms, inverse, sizes = np.unique(matrix.served, axis=0, return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+        count = len(matrix.question_ids)
+        for form in np.flatnonzero(sizes >= min_candidates):
+            items = answer_matrix.unpack(forms[form:form + 1], count)[0]
+            k = int(items.sum())
+            if k < 2:
+                continue
+            members = np.flatnonzero(inverse == form)
+            x = answer_matrix.unpack(matrix.correct[members], count)[:, items]
+            p = x.mean(axis=0)
+            variance = x.sum(axis=1).var()
+            kr20 = k / (k - 1) * (1 - (p * (1 - p)).sum() / variance) if variance > 0 else np.nan
+            rows.append({
+                "form": ",".join(str(qid) for qid in np.asarray(matrix.question_ids)[items]),
+                "items": k,
+                "candidates": len(members),
+                "kr20": kr20,
+            })
+    return pd.DataFrame(rows, columns=["form", "items", "candidates", "kr20"])
+
+
+def complexity_summary(items):
+    """
+    Item statistics per (type, complexity level), plus the Spearman rank
+    correlation between complexity and difficulty (1 - p) per type; a
+    positive value means harder-labelled items are answered correctly less
+    often.
+    """
+    observed = items[items["served"] > 0]
+    summary = observed.groupby(["type", "complexity"]).agg(
+        items=("question_id", "count"),
+        mean_p_value=("p_value", "mean"),
+        mean_point_biserial=("point_biserial", "mean"),
+    ).reset_index()
+    summary["spearman"] = summary["type"].map({
+        # Pearson correlation of ranks (pandas' method="spearman" needs SciPy)
+        item_type: group["complexity"].rank().corr((1 - group["p_value"]).rank())
+        for item_type, group in observed.groupby("type")
+    })
+    return summary
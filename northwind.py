@@ -0,0 +1,264 @@
+"""
+Northwind fixture database used to grade SQL answers by execution.
+
+The schema is derived from the ``table_info`` blocks of the question bank, so
+every column a question documents exists in the fixture. The rows are a small,
+deterministic Northwind-style data set sized so that every reference solution
+returns a non-empty result.
+"""
+import random
+import re
+import sqlite3
+from collections.abc import Mapping
+from datetime import date, timedelta
+
+# ==========================
+# Schema from table_info
+# ==========================
+SQLITE_TYPES = {
+    "INT": "INTEGER",
+    "BIT": "INTEGER",
+    "DECIMAL": "REAL",
+    "VARCHAR": "TEXT",
+    "TEXT": "TEXT",
+    "DATE": "TEXT",
+    "DATETIME": "TEXT",
+}
+
+_COLUMN_SPEC = re.compile(r"^\s*(\w+)\s*\(([^)]*)\)")
+
+
+def collect_schema(questions):
+    """
+    Merge the documented columns of every question into one schema.
+    Returns {table: [(column, declared_type, is_pk), ...]} in first-seen order.
+    """
+    schema = {}
+    for question in questions:
+        for table_name, table_data in question.get("table_info", {}).items():
+            if not isinstance(table_data, Mapping):
+                continue  # e.g. the free-text "relationship" entry
+            columns = schema.setdefault(table_name, {})
+            for spec in table_data.get("columns", []):
+                match = _COLUMN_SPEC.match(spec)
+                if not match or match.group(1) in columns:
+                    continue
+                flags = [f.strip().upper() for f in match.group(2).split(",")]
+                columns[match.group(1)] = (match.group(1), flags[0], "PK" in flags[1:])
+    return {table: list(columns.values()) for table, columns in schema.items()}
+
+
+def create_table_sql(table, columns):
+    """Build the CREATE TABLE statement for one fixture table."""
+    parts = []
+    for name, declared_type, is_pk in columns:
+        column_sql = f"{name} {SQLITE_TYPES.get(declared_type, 'TEXT')}"
+        if is_pk:
+            column_sql += " PRIMARY KEY"
+        parts.append(column_sql)
+    return f"CREATE TABLE {table} ({', '.join(parts)})"
+
+
+# ==========================
+# Seed data
+# ==========================
+SHIPPERS = [
+    (1, "Speedy Express", "(503) 555-9831"),
+    (2, "United Package", "(503) 555-3199"),
+    (3, "Federal Shipping", "(503) 555-9931"),
+]
+
+CATEGORIES = [
+    (1, "Beverages", "Soft drinks, coffees, teas, beers, and ales"),
+    (2, "Condiments", "Sweet and savory sauces, relishes, spreads, and seasonings"),
+    (3, "Confections", "Desserts, candies, and sweet breads"),
+    (4, "Dairy Products", "Cheeses"),
+    (5, "Grains/Cereals", "Breads, crackers, pasta, and cereal"),
+    (6, "Meat/Poultry", "Prepared meats"),
+    (7, "Produce", "Dried fruit and bean curd"),
+    (8, "Seafood", "Seaweed and fish"),
+]
+
+# employeeid, firstname, lastname, title, country, birthdate, hiredate
+EMPLOYEES = [
+    (1, "Nancy", "Davolio", "Sales Representative", "USA", "1948-12-08", "1992-05-01"),
+    (2, "Andrew", "Fuller", "Vice President, Sales", "USA", "1952-02-19", "1992-08-14"),
+    (3, "Janet", "Leverling", "Sales Representative", "USA", "1963-08-30", "1992-04-01"),
+    (4, "Margaret", "Peacock", "Sales Representative", "USA", "1937-09-19", "1993-05-03"),
+    (5, "Steven", "Buchanan", "Sales Manager", "UK", "1955-03-04", "1993-10-17"),
+    (6, "Michael", "Suyama", "Sales Representative", "UK", "1963-07-02", "1993-10-17"),
+    (7, "Robert", "King", "Sales Representative", "UK", "1960-05-29", "1994-01-02"),
+    (8, "Laura", "Callahan", "Inside Sales Coordinator", "USA", "1958-01-09", "1994-03-05"),
+    (9, "Anne", "Dodsworth", "Sales Representative", "UK", "1966-01-27", "1994-11-15"),
+]
+
+# supplierid, companyname, contactname, contacttitle
+SUPPLIERS = [
+    (1, "Exotic Liquids", "Charlotte Cooper", "Purchasing Manager"),
+    (2, "New Orleans Cajun Delights", "Shelley Burke", "Order Administrator"),
+    (3, "Grandma Kelly's Homestead", "Regina Murphy", "Sales Representative"),
+    (4, "Tokyo Traders", "Yoshi Nagase", "Marketing Manager"),
+    (5, "Cooperativa de Quesos 'Las Cabras'", "Antonio del Valle Saavedra", "Export Administrator"),
+    (6, "Mayumi's", "Mayumi Ohno", "Marketing Representative"),
+    (7, "Pavlova, Ltd.", "Ian Devling", "Marketing Manager"),
+    (8, "Specialty Biscuits, Ltd.", "Peter Wilson", "Sales Representative"),
+    (9, "Aux joyeux ecclesiastiques", "Guylene Nodier", "Sales Manager"),
+]
+
+# productid, productname, supplierid, categoryid, unitprice,
+# unitsinstock, unitsonorder, reorderlevel, discontinued
+PRODUCTS = [
+    (1, "Chai", 1, 1, 18.0, 39, 0, 10, 0),
+    (2, "Chang", 1, 1, 19.0, 17, 40, 25, 0),
+    (3, "Aniseed Syrup", 1, 2, 10.0, 13, 70, 25, 0),
+    (4, "Chef Anton's Cajun Seasoning", 2, 2, 22.0, 53, 0, 0, 0),
+    (5, "Chef Anton's Gumbo Mix", 2, 2, 21.35, 0, 0, 0, 1),
+    (6, "Grandma's Boysenberry Spread", 3, 2, 25.0, 120, 0, 25, 0),
+    (7, "Uncle Bob's Organic Dried Pears", 3, 7, 30.0, 15, 0, 10, 0),
+    (8, "Northwoods Cranberry Sauce", 3, 2, 40.0, 6, 0, 0, 0),
+    (9, "Mishi Kobe Niku", 4, 6, 97.0, 29, 0, 0, 1),
+    (10, "Ikura", 4, 8, 31.0, 31, 0, 0, 0),
+    (11, "Queso Cabrales", 5, 4, 21.0, 22, 30, 30, 0),
+    (12, "Queso Manchego La Pastora", 5, 4, 38.0, 86, 0, 0, 0),
+    (13, "Konbu", 6, 8, 6.0, 24, 0, 5, 0),
+    (14, "Tofu", 6, 7, 23.25, 35, 0, 0, 0),
+    (15, "Genen Shouyu", 6, 2, 15.5, 39, 0, 5, 0),
+    (16, "Pavlova", 7, 3, 17.45, 29, 0, 10, 0),
+    (17, "Alice Mutton", 7, 6, 39.0, 0, 0, 0, 1),
+    (18, "Carnarvon Tigers", 7, 8, 62.5, 42, 0, 0, 0),
+    (19, "Teatime Chocolate Biscuits", 8, 3, 9.2, 25, 0, 5, 0),
+    (20, "Sir Rodney's Marmalade", 8, 3, 81.0, 40, 0, 0, 0),
+    (21, "Sir Rodney's Scones", 8, 3, 10.0, 3, 40, 5, 0),
+    (22, "Gustaf's Knackebrod", 9, 5, 21.0, 104, 0, 25, 0),
+    (23, "Tunnbrod", 9, 5, 9.0, 61, 0, 25, 0),
+    (24, "Cote de Blaye", 9, 1, 263.5, 17, 0, 15, 0),
+    (25, "Chartreuse verte", 9, 1, 18.0, 5, 0, 5, 0),
+]
+
+# customerid, companyname, contactname, contacttitle, city, region, country
+CUSTOMERS = [
+    ("ALFKI", "Alfreds Futterkiste", "Maria Anders", "Sales Representative", "Berlin", None, "Germany"),
+    ("ANATR", "Ana Trujillo Emparedados y helados", "Ana Trujillo", "Owner", "Mexico D.F.", None, "Mexico"),
+    ("ANTON", "Antonio Moreno Taqueria", "Antonio Moreno", "Owner", "Mexico D.F.", None, "Mexico"),
+    ("AROUT", "Around the Horn", "Thomas Hardy", "Sales Representative", "London", None, "UK"),
+    ("BERGS", "Berglunds snabbkop", "Christina Berglund", "Order Administrator", "Lulea", None, "Sweden"),
+    ("BLAUS", "Blauer See Delikatessen", "Hanna Moos", "Sales Representative", "Mannheim", None, "Germany"),
+    ("BONAP", "Bon app'", "Laurence Lebihan", "Owner", "Marseille", None, "France"),
+    ("BOTTM", "Bottom-Dollar Markets", "Elizabeth Lincoln", "Accounting Manager", "Tsawassen", "BC", "Canada"),
+    ("CACTU", "Cactus Comidas para llevar", "Patricio Simpson", "Sales Agent", "Buenos Aires", None, "Argentina"),
+    ("CENTC", "Centro comercial Moctezuma", "Francisco Chang", "Marketing Manager", "Mexico D.F.", None, "Mexico"),
+    ("COMMI", "Comercio Mineiro", "Pedro Afonso", "Sales Associate", "Sao Paulo", "SP", "Brazil"),
+    ("EASTC", "Eastern Connection", "Ann Devon", "Sales Agent", "London", None, "UK"),
+    ("ERNSH", "Ernst Handel", "Roland Mendel", "Sales Manager", "Graz", None, "Austria"),
+    ("FISSA", "FISSA Fabrica Inter. Salchichas S.A.", "Diego Roel", "Accounting Manager", "Madrid", None, "Spain"),
+    ("FOLKO", "Folk och fa HB", "Maria Larsson", "Owner", "Bracke", None, "Sweden"),
+    ("GROSR", "GROSELLA-Restaurante", "Manuel Pereira", "Owner", "Caracas", "DF", "Venezuela"),
+    ("HANAR", "Hanari Carnes", "Mario Pontes", "Accounting Manager", "Rio de Janeiro", "RJ", "Brazil"),
+    ("LACOR", "La corne d'abondance", "Daniel Tonini", "Sales Representative", "Versailles", None, "France"),
+    ("MAISD", "Maison Dewey", "Catherine Dewey", "Sales Agent", "Bruxelles", None, "Belgium"),
+    ("PARIS", "Paris specialites", "Marie Bertrand", "Owner", "Paris", None, "France"),
+    ("QUICK", "QUICK-Stop", "Horst Kloss", "Accounting Manager", "Cunewalde", None, "Germany"),
+    ("RATTC", "Rattlesnake Canyon Grocery", "Paula Wilson", "Assistant Sales Representative", "Albuquerque", "NM", "USA"),
+    ("SAVEA", "Save-a-lot Markets", "Jose Pavarotti", "Sales Representative", "Boise", "ID", "USA"),
+    ("SUPRD", "Supremes delices", "Pascale Cartrain", "Accounting Manager", "Charleroi", None, "Belgium"),
+    ("VINET", "Vins et alcools Chevalier", "Paul Henriot", "Accounting Manager", "Reims", None, "France"),
+    ("WHITC", "White Clover Markets", "Karl Jablonski", "Owner", "Seattle", "WA", "USA"),
+]
+
+# Customers that never order, so the LEFT JOIN questions have answers.
+INACTIVE_CUSTOMERS = ("FISSA", "PARIS")
+
+FIRST_ORDER_ID = 10248
+FIRST_ORDER_DATE = date(2014, 7, 4)
+LAST_ORDER_DATE = date(2016, 5, 6)
+ORDER_COUNT = 400
+SEED = 1996
+
+
+def generate_orders():
+    """Deterministically generate (orders, orderdetails) rows."""
+    rng = random.Random(SEED)
+    active = [c for c in CUSTOMERS if c[0] not in INACTIVE_CUSTOMERS]
+    span = (LAST_ORDER_DATE - FIRST_ORDER_DATE).days
+    orders, details = [], []
+    for n in range(ORDER_COUNT):
+        order_id = FIRST_ORDER_ID + n
+        customer = rng.choice(active)
+        order_date = FIRST_ORDER_DATE + timedelta(days=span * n // (ORDER_COUNT - 1))
+        shipped = order_date + timedelta(days=rng.randint(1, 30))
+        orders.append((
+            order_id,
+            customer[0],
+            rng.randint(1, 9),
+            order_date.isoformat(),
+            shipped.isoformat() if shipped <= LAST_ORDER_DATE else None,
+            rng.randint(1, 3),
+            round(rng.uniform(0.5, 400.0), 2),
+            customer[6],
+        ))
+        # A few bulk orders so the high-value questions have rows.
+        bulk = n % 37 == 0
+        for product in rng.sample(PRODUCTS, rng.randint(1, 4)):
+            details.append((
+                order_id,
+                product[0],
+                product[4],
+                rng.randint(40, 120) if bulk else rng.randint(1, 40),
+                rng.choice((0.0, 0.0, 0.05, 0.1, 0.15, 0.2, 0.25)),
+            ))
+    return orders, details
+
+
+def seed_rows():
+    """Return {table: (column_names, rows)} for the built-in data set."""
+    orders, details = generate_orders()
+    return {
+        "shippers": (("shipperid", "companyname", "phone"), SHIPPERS),
+        "categories": (("categoryid", "categoryname", "description"), CATEGORIES),
+        "employees": (
+            ("employeeid", "firstname", "lastname", "title", "country", "birthdate", "hiredate"),
+            [e[:5] + (e[5] + " 00:00:00", e[6]) for e in EMPLOYEES],
+        ),
+        "suppliers": (("supplierid", "companyname", "contactname", "contacttitle"), SUPPLIERS),
+        "products": (
+            ("productid", "productname", "supplierid", "categoryid", "unitprice",
+             "unitsinstock", "unitsonorder", "reorderlevel", "discontinued"),
+            PRODUCTS,
+        ),
+        "customers": (
+            ("customerid", "companyname", "contactname", "contacttitle", "city", "region", "country"),
+            CUSTOMERS,
+        ),
+        "orders": (
+            ("orderid", "customerid", "employeeid", "orderdate", "shippeddate",
+             "shipvia", "freight", "shipcountry"),
+            orders,
+        ),
+        "orderdetails": (("orderid", "productid", "unitprice", "quantity", "discount"), details),
+    }
+
+
+# ==========================
+# Database construction
+# ==========================
+def build_database(schema, target=":memory:"):
+    """
+    Create and populate the fixture database for a ``collect_schema`` result.
+    Seed columns that no question documents are skipped, and documented
+    columns without seed data are left NULL.
+    """
+    seed = seed_rows()
+    conn = sqlite3.connect(target, check_same_thread=False)
+    with conn:
+        for table, columns in schema.items():
+            conn.execute(create_table_sql(table, columns))
+            if table not in seed:
+                continue
+            seed_columns, rows = seed[table]
+            wanted = [c[0] for c in columns if c[0] in seed_columns]
+            positions = [seed_columns.index(c) for c in wanted]
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(wanted)}) VALUES ({', '.join('?' * len(wanted))})",
+                [tuple(row[i] for i in positions) for row in rows],
+            )
+    return conn
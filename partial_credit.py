@@ -0,0 +1,197 @@
+"""
+Structural partial credit for SQL answers.
+
+Candidate and reference queries are parsed into a lightweight clause-level
+AST (SELECT list, FROM tables, JOIN conditions, WHERE/HAVING predicates,
+GROUP BY, ORDER BY) and scored by per-clause overlap. Parsing and diffing run
+under a hard size and time budget, so pathological input scores 0 instead of
+stalling a rerun: text over MAX_SQL_LENGTH is rejected before it is lexed,
+and the deadline is checked inside the parsing loops. Reference ASTs are
+parsed once per question and cached.
+"""
+import time
+
+import sql_lexer
+
+MAX_TOKENS = 2000
+MAX_SQL_LENGTH = 20000  # characters; longer text is not lexed at all
+DEADLINE_CHECK_INTERVAL = 256  # loop iterations between deadline checks
+TIME_BUDGET_SECONDS = 0.05
+
+CLAUSE_WEIGHTS = {
+    "select": 0.30,
+    "from": 0.15,
+    "join": 0.15,
+    "where": 0.20,
+    "group_by": 0.10,
+    "having": 0.05,
+    "order_by": 0.05,
+}
+# Top-level keywords that open a clause; "group"/"order" are followed by "by"
+_CLAUSE_STARTS = {"from": "from", "where": "where", "group": "group_by",
+                  "having": "having", "order": "order_by"}
+
+_REFERENCE_ASTS = {}
+
+
+class BudgetExceeded(Exception):
+    """Raised when parsing or diffing exceeds MAX_SQL_LENGTH, MAX_TOKENS or TIME_BUDGET_SECONDS."""
+
+
+class _Deadline:
+    def __init__(self, seconds):
+        self.at = time.monotonic() + seconds
+
+    def check(self):
+        if time.monotonic() > self.at:
+            raise BudgetExceeded("time budget exceeded")
+
+
+def _unqualified(tokens):
+    """Render tokens without ``table.`` qualifiers (a lenient column identity)."""
+    out = []
+    for i, token in enumerate(tokens):
+        if token == "." or (i + 1 < len(tokens) and tokens[i + 1] == "."):
+            continue
+        out.append(token)
+    return " ".join(out)
+
+
+def _split_top_level(tokens, separators):
+    parts, current, depth = [], [], 0
+    for token in tokens:
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        if depth == 0 and token in separators:
+            parts.append(current)
+            current = []
+        else:
+            current.append(token)
+    parts.append(current)
+    return [p for p in parts if p]
+
+
+def _predicate(tokens, render=_unqualified):
+    """Canonical predicate text; the sides of a top-level '=' are ordered."""
+    sides = _split_top_level(tokens, ("=",))
+    if len(sides) == 2:
+        return " = ".join(sorted(render(side) for side in sides))
+    return render(tokens)
+
+
+def parse(sql, deadline=None):
+    """
+    Parse ``sql`` into {clause: frozenset | tuple}.
+    Raises BudgetExceeded for inputs over MAX_SQL_LENGTH or MAX_TOKENS, or
+    past the deadline.
+    """
+    deadline = deadline or _Deadline(TIME_BUDGET_SECONDS)
+    if len(sql) > MAX_SQL_LENGTH:
+        raise BudgetExceeded(f"query is longer than {MAX_SQL_LENGTH} characters")
+    tokens = sql_lexer.lex(sql)
+    if len(tokens) > MAX_TOKENS:
+        raise BudgetExceeded(f"query has more than {MAX_TOKENS} tokens")
+    deadline.check()
+    tokens, _, tables = sql_lexer.resolve_table_aliases(tokens)
+    deadline.check()
+    ast = {clause: frozenset() for clause in CLAUSE_WEIGHTS}
+    ast["order_by"] = ()
+    if not tokens or tokens[0] != "select":
+        return ast
+    _, items, rest = sql_lexer.split_select(tokens)
+    aliases = {}
+    select = set()
+    for n, item in enumerate(items):
+        if n % DEADLINE_CHECK_INTERVAL == 0:
+            deadline.check()
+        expression, alias = sql_lexer.strip_column_alias(item)
+        select.add(_unqualified(expression))
+        if alias is not None:
+            aliases[alias] = _unqualified(expression)
+    ast["select"] = frozenset(select)
+
+    # Cut the remainder into top-level clauses
+    clauses, current, name, depth = {}, [], None, 0
+    for i, token in enumerate(rest):
+        if i % DEADLINE_CHECK_INTERVAL == 0:
+            deadline.check()
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        if depth == 0 and token in _CLAUSE_STARTS and (token not in ("group", "order") or rest[i + 1:i + 2] == ["by"]):
+            if name:
+                clauses[name] = current
+            name, current = _CLAUSE_STARTS[token], []
+            continue
+        if depth == 0 and token == "by" and current == [] and name in ("group_by", "order_by"):
+            continue
+        current.append(token)
+    if name:
+        clauses[name] = current
+    deadline.check()
+
+    ast["from"] = frozenset(tables)
+    joins = []
+    for segment in _split_top_level(clauses.get("from", []), ("on",))[1:]:
+        condition = _split_top_level(segment, ("join", "left", "right", "full", "inner", "cross", "outer"))
+        joins.extend(_split_top_level(condition[0], ("and",)) if condition else [])
+    # Join conditions keep their (alias-resolved) table qualifiers
+    ast["join"] = frozenset(_predicate(p, " ".join) for p in joins)
+    ast["where"] = frozenset(_predicate(p) for p in _split_top_level(clauses.get("where", []), ("and",)))
+    ast["having"] = frozenset(_predicate(p) for p in _split_top_level(clauses.get("having", []), ("and",)))
+    ast["group_by"] = frozenset(_unqualified(p) for p in _split_top_level(clauses.get("group_by", []), (",",)))
+    order_by = []
+    for item in _split_top_level(clauses.get("order_by", []), (",",)):
+        item = [t for t in item if t != "asc"]
+        if not item:
+            continue
+        if item[0] in aliases and item[1:] in ([], ["desc"]):
+            item = [aliases[item[0]]] + item[1:]
+        order_by.append(_unqualified(item))
+    ast["order_by"] = tuple(order_by)
+    deadline.check()
+    return ast
+
+
+def reference_ast(question):
+    """Parsed reference solution, cached per question id."""
+    ast = _REFERENCE_ASTS.get(question["id"])
+    if ast is None:
+        ast = parse(question["solution"], _Deadline(1.0))
+        _REFERENCE_ASTS[question["id"]] = ast
+    return ast
+
+
+def _overlap(expected, actual):
+    if isinstance(expected, tuple):
+        # ORDER BY: position matters
+        if not expected and not actual:
+            return 1.0
+        matches = sum(1 for a, b in zip(expected, actual) if a == b)
+        return matches / max(len(expected), len(actual))
+    if not expected and not actual:
+        return 1.0
+    return len(expected & actual) / len(expected | actual)
+
+
+def score(question, user_sql):
+    """
+    Partial credit in [0, 1] for ``user_sql`` against the question's reference.
+    Clauses absent from both queries are not counted; over-budget input scores 0.
+    """
+    deadline = _Deadline(TIME_BUDGET_SECONDS)
+    try:
+        expected = reference_ast(question)
+        actual = parse(user_sql, deadline)
+    except BudgetExceeded:
+        return 0.0
+    total = weight_sum = 0.0
+    for clause, weight in CLAUSE_WEIGHTS.items():
+        if not expected[clause] and not actual[clause]:
+            continue
+        total += weight * _overlap(expected[clause], actual[clause])
+        weight_sum += weight
+    return round(total / weight_sum, 4) if weight_sum else 0.0
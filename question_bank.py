@@ -0,0 +1,113 @@
+"""
+Question bank loader.
+
+The SQL and Power BI questions live in the versioned ``questions.json`` next to
+this module. ``load_question_bank`` reads it once per process, assigns the SQL
+complexity levels, and returns an immutable structure (read-only mappings and
+tuples) that every Streamlit session and rerun shares; a rerun only pays for a
+cached function call.
+"""
+import collections
+import functools
+import json
+import pathlib
+import types
+
+BANK_PATH = pathlib.Path(__file__).resolve().with_name("questions.json")
+
+QuestionBank = collections.namedtuple("QuestionBank", ["version", "sql", "powerbi", "by_id"])
+
+# PowerBI questions carry easy/medium/hard labels instead of levels
+COMPLEXITY_LEVELS = {"easy": 1, "medium": 2, "hard": 3}
+
+
+def assign_complexity_level(question):
+    """
+    Assign complexity levels based on SQL features:
+    1 (Beginner): Simple SELECT, WHERE with basic operators
+    2 (Intermediate): JOINs, GROUP BY, HAVING, subqueries, LIKE
+    3 (Advanced): Complex joins, multiple aggregations, complex WHERE, CASE statements
+    """
+    solution = question.get("solution", "").lower()
+    num_tables = len(question.get("tables", []))
+    
+    # Count SQL keywords
+    joins = solution.count("join")
+    group_by = solution.count("group by")
+    having = solution.count("having")
+    case_when = solution.count("case")
+    subquery = solution.count("select") > 1
+    distinct = solution.count("distinct")
+    
+    complexity_score = 0
+    
+    # Basic scoring
+    if joins > 0:
+        complexity_score += joins * 2
+    if group_by > 0:
+        complexity_score += 1
+    if having > 0:
+        complexity_score += 1
+    if case_when > 0:
+        complexity_score += 2
+    if subquery:
+        complexity_score += 2
+    if distinct:
+        complexity_score += 0.5
+    
+    # Table count factor
+    if num_tables > 2:
+        complexity_score += 1
+    
+    # Determine level
+    if complexity_score >= 4:
+        return 3  # Advanced
+    elif complexity_score >= 1.5:
+        return 2  # Intermediate
+    else:
+        return 1  # Beginner
+
+
+def complexity_level(question):
+    """Complexity of a question as a level 1-3 (None if unknown)."""
+    complexity = question.get("complexity")
+    if isinstance(complexity, str):
+        return COMPLEXITY_LEVELS.get(complexity.lower())
+    return complexity
+
+
+def freeze(value):
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return types.MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def build_question_bank(data):
+    """Build the frozen bank from the parsed JSON document."""
+    sql_questions = [dict(q) for q in data["sql"]]
+    powerbi_questions = [dict(q) for q in data["powerbi"]]
+
+    # Add complexity level to each question
+    for question in sql_questions:
+        question["complexity"] = assign_complexity_level(question)
+
+    # Assign complexity to PowerBI questions (they already have complexity field)
+    for question in powerbi_questions:
+        if "complexity" not in question:
+            complexity_map = {"easy": 1, "medium": 2, "hard": 3}
+            question["complexity"] = complexity_map.get(question.get("complexity", "medium"), 2)
+
+    sql_questions = freeze(sql_questions)
+    powerbi_questions = freeze(powerbi_questions)
+    by_id = types.MappingProxyType({q["id"]: q for q in sql_questions + powerbi_questions})
+    return QuestionBank(data["version"], sql_questions, powerbi_questions, by_id)
+
+
+@functools.lru_cache(maxsize=None)
+def load_question_bank(path=BANK_PATH):
+    """Load, build and cache the question bank (once per process and path)."""
+    with open(path, encoding="utf-8") as f:
+        return build_question_bank(json.load(f))
@@ -0,0 +1,175 @@
+"""
+Per-rerun section timings.
+
+app.py wraps the named parts of its script (the CSS block, the logo check,
+the session-state init, the admin loader, the schema expander, grading) in
+``section(name, mode)``. Each timing is added to a histogram per section and
+page mode ("candidate" or "admin"), kept per server process, and exported in
+the Prometheus text format:
+
+- ``RERUN_METRICS_FILE=<path>``: the histograms are written to ``path``
+  (atomically) at most every FLUSH_INTERVAL_SECONDS and at exit, for the
+  node exporter's textfile collector or for reading by hand
+- ``RERUN_METRICS_PORT=<port>``: served at ``http://127.0.0.1:<port>/metrics``
+  by a background thread
+
+With neither set the instrumentation is off: ``section`` returns a shared
+no-op context manager, so a rerun pays one function call per section.
+
+A section ended by ``st.stop()`` or ``st.rerun()`` (which raise) is still
+recorded.
+"""
+import atexit
+import bisect
+import contextlib
+import http.server
+import os
+import threading
+import time
+import warnings
+
+METRICS_FILE = os.environ.get("RERUN_METRICS_FILE", "")
+METRICS_PORT = int(os.environ.get("RERUN_METRICS_PORT", "0") or 0)
+ENABLED = bool(METRICS_FILE or METRICS_PORT)
+
+METRIC = "sql_assessment_rerun_section_seconds"
+# Histogram bucket upper bounds (seconds)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FLUSH_INTERVAL_SECONDS = 10.0
+
+_NOOP = contextlib.nullcontext()
+
+_LOCK = threading.Lock()
+_HISTOGRAMS = {}  # (mode, section) -> [count per bucket..., count above the last, sum]
+_LAST_FLUSH = 0.0
+_SERVER = None
+_SERVER_TRIED = False
+
+
+class _Timer:
+    __slots__ = ("name", "mode", "started")
+
+    def __init__(self, name, mode):
+        self.name = name
+        self.mode = mode
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, self.mode, time.perf_counter() - self.started)
+        return False
+
+
+def section(name, mode="candidate"):
+    """Context manager timing one section of a rerun (a shared no-op when disabled)."""
+    if not ENABLED:
+        return _NOOP
+    return _Timer(name, mode)
+
+
+def observe(name, mode, seconds):
+    """Add one timing to the histogram of ``name`` in page ``mode``."""
+    global _LAST_FLUSH
+    _ensure_server()
+    with _LOCK:
+        histogram = _HISTOGRAMS.get((mode, name))
+        if histogram is None:
+            histogram = _HISTOGRAMS[(mode, name)] = [0] * (len(BUCKETS) + 1) + [0.0]
+        histogram[bisect.bisect_left(BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+        now = time.monotonic()
+        due = bool(METRICS_FILE) and now - _LAST_FLUSH >= FLUSH_INTERVAL_SECONDS
+        if due:
+            _LAST_FLUSH = now
+    if due:
+        write_file()
+
+
+def snapshot():
+    """{(mode, section): {"count", "sum", "buckets": cumulative counts per BUCKETS bound}}."""
+    with _LOCK:
+        histograms = {key: list(value) for key, value in _HISTOGRAMS.items()}
+    result = {}
+    for key, histogram in histograms.items():
+        cumulative, running = [], 0
+        for count in histogram[:len(BUCKETS)]:
+            running += count
+            cumulative.append(running)
+        result[key] = {"count": running + histogram[len(BUCKETS)], "sum": histogram[-1], "buckets": cumulative}
+    return result
+
+
+def render():
+    """The histograms in the Prometheus text exposition format."""
+    lines = [
+        f"# HELP {METRIC} Time spent in each section of an app.py rerun.",
+        f"# TYPE {METRIC} histogram",
+    ]
+    for (mode, name), histogram in sorted(snapshot().items()):
+        labels = f'mode="{mode}",section="{name}"'
+        for bound, count in zip(BUCKETS, histogram["buckets"]):
+            lines.append(f'{METRIC}_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'{METRIC}_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+        lines.append(f"{METRIC}_sum{{{labels}}} {histogram['sum']:.6f}")
+        lines.append(f"{METRIC}_count{{{labels}}} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_file(path=None):
+    """Write ``render()`` to ``path`` (default RERUN_METRICS_FILE) via a temporary file and a rename."""
+    path = path or METRICS_FILE
+    if not path:
+        return
+    partial = f"{path}.{os.getpid()}.tmp"
+    with open(partial, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(partial, path)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # one line per scrape would flood the server log
+
+
+def _ensure_server():
+    global _SERVER, _SERVER_TRIED
+    if not METRICS_PORT or _SERVER_TRIED:
+        return
+    with _LOCK:
+        if _SERVER_TRIED:
+            return
+        _SERVER_TRIED = True
+        try:
+            _SERVER = http.server.ThreadingHTTPServer(("127.0.0.1", METRICS_PORT), _Handler)
+        except OSError as exc:
+            warnings.warn(f"rerun metrics endpoint not started on port {METRICS_PORT}: {exc}")
+            return
+        _SERVER.daemon_threads = True
+        threading.Thread(target=_SERVER.serve_forever, name="rerun-metrics", daemon=True).start()
+
+
+def shutdown():
+    """Write the metrics file a last time and stop the endpoint (registered with atexit)."""
+    global _SERVER
+    if METRICS_FILE and _HISTOGRAMS:
+        write_file()
+    server, _SERVER = _SERVER, None
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+atexit.register(shutdown)
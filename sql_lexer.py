@@ -0,0 +1,325 @@
+"""
+SQL lexer and canonicalizer.
+
+``tokenize`` produces a lossless (kind, text) stream (used by the T-SQL
+translator), ``lex`` a fast stream of significant token texts, and
+``normalize_sql`` a canonical form of a query for comparison and cache keys:
+
+- keywords and identifiers are lowercased; string literals and double-quoted
+  tokens keep their case (SQLite reads an unknown ``"France"`` as a string)
+- whitespace, comments and the trailing semicolon are dropped
+- table aliases are resolved (``customers AS c`` ... ``c.customerid`` becomes
+  ``customers.customerid``), and qualifiers are dropped for single-table queries;
+  a table read more than once keeps distinct aliases (see resolve_table_aliases)
+- SELECT-list aliases are dropped unless a clause other than ORDER BY names
+  them; ORDER BY references to them are replaced by the aliased expression
+- SELECT-list items are sorted (not in compound queries, whose column order
+  pairs up the SELECTs) and positional GROUP BY / ORDER BY terms renumbered to
+  match; ``INNER JOIN`` becomes ``JOIN``, ``<>`` becomes ``!=`` and a
+  redundant ``ASC`` is dropped
+
+Two queries with the same canonical form return the same result set (up to
+column order), so the form is safe as a verdict cache key.
+"""
+import functools
+import re
+
+_TOKEN = re.compile(r"""
+     (?P<ws>\s+)
+    |(?P<comment>--[^\n]*|/\*.*?\*/)
+    |(?P<string>[Nn]?'(?:[^']|'')*')
+    |(?P<qident>\[[^\]]*\]|"[^"]*")
+    |(?P<number>\d+(?:\.\d*)?|\.\d+)
+    |(?P<word>[A-Za-z_@#][\w@#$]*)
+    |(?P<op><>|<=|>=|!=|\|\||[-+*/%=<>(),.;])
+    |(?P<other>.)
+""", re.VERBOSE | re.DOTALL)
+
+# Significant tokens of literal-free, lowercased SQL text (whitespace skipped)
+_CODE = re.compile(r"[a-z_@#][\w@#$]*|\d+(?:\.\d*)?|\.\d+|<>|<=|>=|!=|\|\||\[[^\]]*\]|\"[^\"]*\"|\S")
+# The same over text that is not lowercased (it holds double-quoted tokens)
+_CODE_ANY_CASE = re.compile(_CODE.pattern, re.IGNORECASE)
+
+KEYWORDS = frozenset("""
+    select from where join inner left right full outer cross natural on using
+    group by order having as and or not in is null like between case when then
+    else end distinct top limit offset union all except intersect exists asc
+    desc with over partition into values set
+""".split())
+
+# Top-level keywords that end a GROUP BY / ORDER BY list
+_LIST_ENDS = frozenset("having order limit offset fetch union except intersect window".split())
+# What may follow a positional GROUP BY / ORDER BY term (``ORDER BY 2 DESC``)
+_AFTER_POSITION = frozenset((",", "asc", "desc", "nulls")) | _LIST_ENDS
+
+
+def tokenize(sql):
+    """Split SQL into (kind, text) tokens, keeping whitespace."""
+    return [(m.lastgroup, m.group()) for m in _TOKEN.finditer(sql)]
+
+
+def _code_tokens(code):
+    if '"' not in code:
+        return _CODE.findall(code.lower())
+    return [t if t[0] == '"' else t.lower() for t in _CODE_ANY_CASE.findall(code)]
+
+
+def lex(sql):
+    """
+    Significant tokens of ``sql``: lowercased, comments dropped, string literals
+    and double-quoted tokens kept as written, brackets stripped.
+    """
+    if "--" in sql or "/*" in sql:
+        sql = "".join(text for kind, text in tokenize(sql) if kind != "comment")
+    # Splitting on quotes leaves code at even and literal bodies at odd positions
+    parts = sql.split("'")
+    if len(parts) % 2 == 0:
+        parts.append("")  # unterminated literal: close it
+    tokens = _code_tokens(parts[0])
+    for i in range(1, len(parts), 2):
+        literal, code = parts[i], parts[i + 1]
+        if tokens and tokens[-1] in ("n", "N") and parts[i - 1][-1:] in ("n", "N"):
+            tokens.pop()  # N'...' unicode literal
+        if i > 1 and parts[i - 1] == "" and tokens and tokens[-1][0] == "'":
+            tokens[-1] = tokens[-1][:-1] + "''" + literal + "'"  # '' escape
+        else:
+            tokens.append("'" + literal + "'")
+        if code:
+            tokens.extend(_code_tokens(code))
+    if "[" in sql or "<>" in sql:
+        tokens = [t[1:-1] if t[0] == "[" else "!=" if t == "<>" else t for t in tokens]
+    while tokens and tokens[-1] == ";":
+        tokens.pop()
+    return tokens
+
+
+def _is_name(token):
+    # Empty tokens come from empty bracketed identifiers ([])
+    return token != "" and (token[0].isalpha() or token[0] in '_@#"') and token not in KEYWORDS
+
+
+def _ends_operand(token):
+    """True if ``token`` can end an operand (a name, a literal, ``)`` or CASE's ``end``)."""
+    if token in (")", "end") or token[:1] == "'" or _is_name(token):
+        return True
+    return token[:1].isdigit() or (token[:1] == "." and token[1:2].isdigit())  # number
+
+
+def _positions(tokens, value):
+    """Indices of ``value`` in ``tokens`` (list.index keeps the scan in C)."""
+    found = []
+    i = -1
+    try:
+        while True:
+            i = tokens.index(value, i + 1)
+            found.append(i)
+    except ValueError:
+        return found
+
+
+def resolve_table_aliases(tokens):
+    """
+    Resolve table aliases; return (tokens, {alias: table}, tables).
+
+    The alias of a table read once is replaced by the table name and its
+    declaration dropped. A table read more than once (a self-join, or the
+    same table in a subquery) keeps its declarations, with the aliases renamed
+    ``table#1``, ``table#2``... in order of appearance, and an alias declared
+    twice is left as written: distinct aliases stay distinct.
+    """
+    declarations, tables = [], []
+    n = len(tokens)
+    for i in _positions(tokens, "from") + _positions(tokens, "join"):
+        j = i + 1
+        while j < n and _is_name(tokens[j]):
+            tables.append(tokens[j])
+            k = j + 1
+            if k < n and tokens[k] == "as":
+                k += 1
+            if k < n and _is_name(tokens[k]) and (k + 1 >= n or tokens[k + 1] != "."):
+                declarations.append((j, k, tokens[j], tokens[k]))
+                k += 1
+            if k >= n or tokens[k] != ",":
+                break
+            j = k + 1  # comma-separated FROM list
+    if not declarations:
+        return tokens, {}, tables
+    declared = [alias for _, _, _, alias in declarations]
+    aliases, renamed, drop, seen = {}, {}, set(), {}
+    for j, k, table, alias in sorted(declarations):
+        if declared.count(alias) > 1:
+            continue
+        if tables.count(table) == 1:
+            aliases[alias] = table
+            drop.update(range(j + 1, k + 1))
+        else:
+            seen[table] = seen.get(table, 0) + 1
+            renamed[alias] = f"{table}#{seen[table]}"
+            aliases[alias] = table
+            drop.update(range(j + 1, k))  # AS
+    if renamed:
+        tokens = list(tokens)
+        for _, k, _, alias in declarations:
+            if alias in renamed:
+                tokens[k] = renamed[alias]
+    if drop:
+        tokens = [t for i, t in enumerate(tokens) if i not in drop]
+    if aliases:
+        last = len(tokens) - 1
+        tokens = [renamed.get(t) or aliases[t] if t in aliases and i < last and tokens[i + 1] == "." else t
+                  for i, t in enumerate(tokens)]
+    return tokens, aliases, tables
+
+
+def split_select(tokens):
+    """Return (prefix, items, rest) for the top-level SELECT list."""
+    start = 1
+    prefix = []
+    while start < len(tokens) and tokens[start] in ("distinct", "all", "top"):
+        prefix.append(tokens[start])
+        start += 1
+        if prefix[-1] == "top" and start < len(tokens):
+            prefix.append(tokens[start])
+            start += 1
+    end = tokens.index("from") if "from" in tokens else len(tokens)
+    if "(" not in tokens[start:end]:
+        # No nesting before the first FROM: it ends the SELECT list
+        items, current = [], []
+        for token in tokens[start:end]:
+            if token == ",":
+                items.append(current)
+                current = []
+            else:
+                current.append(token)
+        items.append(current)
+        return prefix, items, tokens[end:]
+    items, current, depth = [], [], 0
+    for i in range(start, len(tokens)):
+        token = tokens[i]
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0:
+            if token == "from":
+                items.append(current)
+                return prefix, items, tokens[i:]
+            if token == ",":
+                items.append(current)
+                current = []
+                continue
+        current.append(token)
+    items.append(current)
+    return prefix, items, []
+
+
+def strip_column_alias(item):
+    """Return (expression tokens, alias or None) for one SELECT item."""
+    if len(item) >= 3 and item[-2] == "as":
+        return item[:-2], item[-1]
+    # A bare trailing name is an alias only right after a complete operand:
+    # in ``a - b`` or ``x + ' ' + y`` it is the last operand
+    if len(item) >= 2 and _is_name(item[-1]) and _ends_operand(item[-2]):
+        return item[:-1], item[-1]
+    return item, None
+
+
+def _canonical_rest(rest, column_aliases, single_table):
+    """Canonicalize everything after the SELECT list."""
+    if "inner" in rest:
+        rest = [t for t in rest if t != "inner"]  # INNER JOIN == JOIN
+    if "outer" in rest:
+        rest = [t for t in rest if t != "outer"]  # LEFT OUTER JOIN == LEFT JOIN
+    if "order" in rest:
+        i = len(rest) - 1 - rest[::-1].index("order")
+        head = rest[:i]
+        if head.count("(") == head.count(")"):
+            # Top-level ORDER BY: drop ASC and expand SELECT-list aliases
+            order_by = []
+            tail = rest[i:]
+            last = len(tail) - 1
+            for j, token in enumerate(tail):
+                if token == "asc":
+                    continue
+                if token in column_aliases and tail[j - 1] != "." and (j == last or tail[j + 1] not in (".", "(")):
+                    order_by.extend(column_aliases[token])
+                else:
+                    order_by.append(token)
+            rest = head + order_by
+    return _strip_qualifier(rest, single_table) if single_table else rest
+
+
+def _strip_qualifier(tokens, table):
+    """Drop ``table.`` prefixes (only used when the query reads a single table)."""
+    if "." not in tokens:
+        return tokens
+    out = []
+    skip_dot = False
+    for i, token in enumerate(tokens):
+        if skip_dot:
+            skip_dot = False
+            continue
+        if token == table and i + 1 < len(tokens) and tokens[i + 1] == ".":
+            skip_dot = True
+            continue
+        out.append(token)
+    return out
+
+
+def _renumber_positions(rest, positions):
+    """Rewrite positional top-level GROUP BY / ORDER BY terms (``ORDER BY 2``) through ``positions``."""
+    out = list(rest)
+    last = len(rest) - 1
+    depth, in_list = 0, False
+    for j, token in enumerate(rest):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0:
+            if token == "by" and j and rest[j - 1] in ("group", "order"):
+                in_list = True
+            elif token in _LIST_ENDS:
+                in_list = False
+            elif (in_list and token in positions and rest[j - 1] in ("by", ",")
+                  and (j == last or rest[j + 1] in _AFTER_POSITION)):
+                out[j] = positions[token]
+    return out
+
+
+@functools.lru_cache(maxsize=8192)
+def normalize_sql(sql):
+    """Canonical form of a query: equivalent spellings map to the same string."""
+    tokens = lex(sql)
+    if not tokens:
+        return ""
+    tokens, _, tables = resolve_table_aliases(tokens)
+    if tokens[0] != "select":
+        return " ".join(tokens)
+    prefix, items, rest = split_select(tokens)
+    single_table = tables[0] if len(set(tables)) == 1 and "join" not in rest and tables.count(tables[0]) == 1 else None
+    column_aliases = {}
+    used = None
+    expressions = []
+    for item in items:
+        expression, alias = strip_column_alias(item)
+        if single_table:
+            expression = _strip_qualifier(expression, single_table)
+        if alias is not None:
+            column_aliases[alias] = expression
+            if used is None:
+                # Names outside the ORDER BY: SQLite resolves a SELECT-list
+                # alias in WHERE, GROUP BY and HAVING too, so those are kept
+                used = set(rest[:len(rest) - 1 - rest[::-1].index("order")] if "order" in rest else rest)
+            if alias in used:
+                expression = expression + ["as", alias]
+        expressions.append(" ".join(expression))
+    if "union" not in rest and "except" not in rest and "intersect" not in rest:
+        # The SELECT list of a compound query pairs up with the other SELECTs
+        order = sorted(range(len(expressions)), key=expressions.__getitem__)
+        if order != list(range(len(expressions))):
+            positions = {str(old + 1): str(new + 1) for new, old in enumerate(order)}
+            rest = _renumber_positions(rest, positions)
+            expressions = [expressions[i] for i in order]
+    rest = _canonical_rest(rest, column_aliases, single_table)
+    return " ".join(["select"] + prefix + [", ".join(expressions)] + rest)
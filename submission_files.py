@@ -0,0 +1,456 @@
+"""
+File-based submissions folder.
+
+Deployments that run with ``SUBMISSIONS_BACKEND=files`` write one CSV per
+attempt, and the submissions store indexes the folder (see
+``submission_store.import_csv_files``). Attempt files go into date-sharded
+directories (``YYYY/MM/DD/<email>_<attempt ID>_YYYYMMDD_HHMMSS.csv``) so no
+directory grows without bound; the attempt ID keeps two attempts of one email
+in the same second apart and makes saving an attempt again overwrite its own
+file (an email or ID that is not a safe file name is sanitized and suffixed
+with a hash, see ``file_stem``; the real email stays in the file and the
+manifest), and every save appends one line (email, submitted at,
+path, score) to ``manifest.jsonl``. The manifest is append-only: readers keep
+their place in it and only parse new lines, and per-user and per-window
+lookups (``submissions_for_email``, ``submissions_between``) are answered
+from it without listing a directory. Files written by earlier versions
+directly in ``submissions/`` are still read (the legacy files).
+
+Thousands of small files make every read of the folder slow, so ``compact``
+folds the files of each finished day into one gzip-compressed segment
+(``segments/YYYYMMDD.<time>.csv.gz``) and records it in
+``segments/manifest.json`` together with the files it absorbed. Readers
+(``scan``) take the segments plus only the files that are not compacted yet
+(the tail); ``scan_since`` returns only what was added after an earlier scan.
+
+Compaction never drops a submission: the segment and the segment manifest are
+written to temporary files and renamed into place before the source files are
+removed, and readers skip files listed there even if that removal did not
+happen. Segment rows keep their source path, so a submission keeps the same
+identity before and after compaction. Run it from cron or by hand; ``reindex``
+appends manifest lines for attempt files that lack one (a save interrupted
+between writing the file and appending its line)::
+
+    python submission_files.py compact [submissions]
+    python submission_files.py reindex [submissions]
+"""
+import bisect
+import collections
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+
+SUBMISSIONS_DIR = "submissions"
+INDEX = "manifest.jsonl"
+SEGMENT_DIR = "segments"
+MANIFEST = "manifest.json"
+SOURCE_FIELD = "Source File"  # segment column holding each row's original path
+
+MAX_STEM = 64  # characters of the email kept in a file name
+UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9@+.-]")
+
+ATTEMPT_FILE = re.compile(r"_(\d{8})_(\d{6})\.csv$")
+SHARDED_FILE = re.compile(r"^\d{4}/\d{2}/\d{2}/[^/]+_\d{8}_\d{6}\.csv$")
+
+# Stamp of indexed attempt files: they are written once and never change
+INDEXED = ("indexed",)
+
+IndexEntry = collections.namedtuple("IndexEntry", ["email", "submitted_at", "path", "score"])
+
+_LOCK = threading.Lock()  # one compaction at a time per process
+
+# Parsed manifests by directory: {"generation", "offset", "entries", "by_email", "by_time"}
+_INDEX_LOCK = threading.Lock()
+_INDEXES = {}
+
+# Parsed segment manifests by directory: (file stamp, manifest, compacted sources)
+_SEGMENTS_LOCK = threading.Lock()
+_SEGMENTS = {}
+
+# Where an incremental scan stopped (see scan_since): the manifest generation
+# and number of its entries read, the segment files read, and the directory
+# stamp and legacy files read
+ScanPosition = collections.namedtuple("ScanPosition", ["generation", "entries", "segments", "directory", "legacy"])
+
+
+def file_stem(email):
+    """
+    File-name part for an email (or attempt ID): the email itself when it is
+    a short, safe name, otherwise its safe characters (at most MAX_STEM) plus
+    a hash of the whole email, so no email can leave the shard or exceed name
+    limits.
+    """
+    email = str(email or "")
+    stem = UNSAFE_CHARS.sub("_", email).lstrip(".")[:MAX_STEM]
+    if stem == email and stem:
+        return stem
+    return f"{stem}-{hashlib.sha1(email.encode('utf-8')).hexdigest()[:10]}"
+
+
+def attempt_path(key, record):
+    """Path of the attempt file of a record and its attempt ID relative to the folder, "/"-separated."""
+    submitted = datetime.strptime(record["Submitted At"], "%Y-%m-%d %H:%M:%S")
+    stem = f"{file_stem(record['Email'])}_{file_stem(key)}"
+    return f"{submitted.strftime('%Y/%m/%d')}/{stem}_{submitted.strftime('%Y%m%d_%H%M%S')}.csv"
+
+
+def _full_path(directory, relative):
+    return os.path.join(directory, *relative.split("/"))
+
+
+def _write_atomic(path, data):
+    partial = f"{path}.{os.getpid()}.tmp"
+    with open(partial, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+
+
+def _csv_bytes(fields, rows):
+    buffer = io.StringIO(newline="")
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _append_index(directory, entries):
+    # One write on an O_APPEND descriptor, so lines from concurrent writers never interleave
+    if not entries:
+        return
+    data = "".join(json.dumps(entry._asdict()) + "\n" for entry in entries).encode("utf-8")
+    fd = os.open(os.path.join(directory, INDEX), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def save_submission(key, record, directory=SUBMISSIONS_DIR):
+    """Write one attempt file (atomically) and its manifest line; returns the file's path."""
+    return save_submissions([(key, record)], directory)[0]
+
+
+def save_submissions(items, directory=SUBMISSIONS_DIR):
+    """
+    Write the attempt files of (attempt ID, record) pairs (each atomically),
+    then their manifest lines in one append; returns the files' paths.
+    """
+    entries, paths = [], []
+    for key, record in items:
+        relative = attempt_path(key, record)
+        path = _full_path(directory, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, _csv_bytes(list(record), [record]))
+        entries.append(_index_entry(record, relative))
+        paths.append(path)
+    _append_index(directory, entries)
+    return paths
+
+
+def _index_entry(record, relative):
+    return IndexEntry(record.get("Email"), record.get("Submitted At"), relative, record.get("Score (%)"))
+
+
+def parse_value(field, value):
+    """Record value from its CSV text."""
+    if value == "":
+        return None
+    if field in ("Total Questions", "Correct Answers"):
+        return int(float(value))
+    if field in ("Score (%)", "Partial Score (%)"):
+        return float(value)
+    if value in ("True", "False"):
+        return value == "True"
+    return value
+
+
+# ==========================
+# Manifest lookups
+# ==========================
+def read_index(directory=SUBMISSIONS_DIR):
+    """
+    The parsed manifest of ``directory``, brought up to date by reading only
+    the lines appended since the last call. Returns the list of IndexEntry in
+    save order; callers must not modify it.
+    """
+    return _index(directory)["entries"]
+
+
+def _index(directory):
+    path = os.path.join(directory, INDEX)
+    with _INDEX_LOCK:
+        index = _INDEXES.get(directory)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            size = 0
+        if index is None or size < index["offset"]:  # new, or the manifest was replaced
+            generation = index["generation"] + 1 if index else 0
+            index = _INDEXES[directory] = {"generation": generation, "offset": 0, "entries": [],
+                                           "by_email": {}, "by_time": []}
+        if size > index["offset"]:
+            with open(path, "rb") as f:
+                f.seek(index["offset"])
+                data = f.read(size - index["offset"])
+            complete = data.rfind(b"\n") + 1  # a line still being appended is read next time
+            for line in data[:complete].splitlines():
+                if not line.strip():
+                    continue
+                entry = IndexEntry(**json.loads(line))
+                position = len(index["entries"])
+                index["entries"].append(entry)
+                index["by_email"].setdefault(_email_key(entry.email), []).append(position)
+                # Saves arrive in time order, so this is an append in the common case
+                bisect.insort(index["by_time"], (entry.submitted_at or "", position))
+            index["offset"] += complete
+        return index
+
+
+def _email_key(email):
+    return (email or "").strip().lower()
+
+
+def submissions_for_email(email, directory=SUBMISSIONS_DIR):
+    """Manifest entries of one email (case-insensitive), in save order."""
+    index = _index(directory)
+    return [index["entries"][i] for i in index["by_email"].get(_email_key(email), [])]
+
+
+def submissions_between(start, end, directory=SUBMISSIONS_DIR):
+    """
+    Manifest entries submitted in [start, end) (datetimes or "YYYY-MM-DD
+    HH:MM:SS" strings), in time order.
+    """
+    start, end = (t.strftime("%Y-%m-%d %H:%M:%S") if isinstance(t, datetime) else t for t in (start, end))
+    index = _index(directory)
+    by_time = index["by_time"]
+    first = bisect.bisect_left(by_time, (start, -1))
+    last = bisect.bisect_left(by_time, (end, -1))
+    return [index["entries"][i] for _, i in by_time[first:last]]
+
+
+def load_attempt(entry, directory=SUBMISSIONS_DIR):
+    """The submission record of a manifest entry, from its file or from its day's segment."""
+    path = _full_path(directory, entry.path)
+    if not os.path.exists(path):
+        segment = _segments(directory)[0]["segments"].get(ATTEMPT_FILE.search(entry.path).group(1))
+        path = os.path.join(directory, SEGMENT_DIR, segment["file"]) if segment else path
+    for source, record in read_records(path, entry.path):
+        if source == entry.path:
+            return record
+    return None
+
+
+def reindex(directory=SUBMISSIONS_DIR):
+    """Append manifest lines for sharded attempt files missing from it; returns their paths."""
+    indexed = {entry.path for entry in read_index(directory)}
+    missing = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d.isdigit()]
+        for file in files:
+            relative = os.path.relpath(os.path.join(root, file), directory).replace(os.sep, "/")
+            if SHARDED_FILE.match(relative) and relative not in indexed:
+                missing.append(relative)
+    missing.sort()
+    _append_index(directory, [_index_entry(record, relative) for relative in missing
+                              for _, record in read_records(_full_path(directory, relative), relative)])
+    return missing
+
+
+# ==========================
+# Reading
+# ==========================
+def read_manifest(directory=SUBMISSIONS_DIR):
+    """Segment manifest: ``{"segments": {day: {"file", "rows", "sources"}}}`` (empty if nothing is compacted)."""
+    try:
+        with open(os.path.join(directory, SEGMENT_DIR, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"segments": {}}
+
+
+def _compacted(manifest):
+    return frozenset(source for segment in manifest["segments"].values() for source in segment["sources"])
+
+
+def _segments(directory):
+    # (segment manifest, its compacted sources), parsed again only when compaction replaced the file
+    path = os.path.join(directory, SEGMENT_DIR, MANIFEST)
+    with _SEGMENTS_LOCK:
+        stamp = _stamp(path)
+        cached = _SEGMENTS.get(directory)
+        if cached is None or cached[0] != stamp:
+            manifest = read_manifest(directory)
+            cached = _SEGMENTS[directory] = (stamp, manifest, _compacted(manifest))
+        return cached[1], cached[2]
+
+
+def legacy_files(directory=SUBMISSIONS_DIR, manifest=None):
+    """Attempt files written directly in ``directory`` by earlier versions and not compacted."""
+    if not os.path.isdir(directory):
+        return []
+    compacted = _compacted(manifest) if manifest else _segments(directory)[1]
+    return sorted(f for f in os.listdir(directory) if f.endswith(".csv") and f not in compacted)
+
+
+def indexed_files(directory=SUBMISSIONS_DIR, manifest=None):
+    """Relative paths of the manifest's attempt files not compacted, in save order (no listing)."""
+    compacted = _compacted(manifest) if manifest else _segments(directory)[1]
+    return list(dict.fromkeys(entry.path for entry in read_index(directory) if entry.path not in compacted))
+
+
+def tail_files(directory=SUBMISSIONS_DIR, manifest=None):
+    """Relative paths of all attempt files not absorbed by a segment."""
+    manifest = manifest or read_manifest(directory)
+    return legacy_files(directory, manifest) + indexed_files(directory, manifest)
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None  # removed by a compaction since the listing
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def scan(directory=SUBMISSIONS_DIR):
+    """
+    [(path, stamp, source)] of everything holding submissions: the segments
+    by day, the legacy files, then the indexed attempt files.
+    """
+    return scan_since(None, directory)[0]
+
+
+def scan_since(position, directory=SUBMISSIONS_DIR):
+    """
+    Like ``scan``, but only what was added after ``position`` (a ScanPosition
+    returned by an earlier call; None for everything). Returns (entries, new
+    position). Only manifest lines appended since are read, segment files are
+    new when their name is (compaction never rewrites one in place), and the
+    folder is listed for legacy files only when its stamp changed. An attempt
+    file compacted after the position is covered by its new segment.
+    """
+    manifest, compacted = _segments(directory)
+    index = _index(directory)
+    if position is None or position.generation != index["generation"]:
+        position = ScanPosition(index["generation"], 0, frozenset(), None, frozenset())
+    segments = {segment["file"]: day for day, segment in manifest["segments"].items()}
+    entries = []
+    for file in sorted(set(segments) - position.segments, key=segments.get):
+        path = os.path.join(directory, SEGMENT_DIR, file)
+        entries.append((path, _stamp(path), None))
+    directory_stamp, legacy = _stamp(directory), position.legacy
+    if directory_stamp != position.directory:
+        legacy = frozenset(legacy_files(directory))
+        for file in sorted(legacy - position.legacy):
+            path = os.path.join(directory, file)
+            entries.append((path, _stamp(path), file))
+    indexed = index["entries"][position.entries:]
+    for relative in dict.fromkeys(entry.path for entry in indexed if entry.path not in compacted):
+        entries.append((_full_path(directory, relative), INDEXED, relative))
+    position = ScanPosition(index["generation"], position.entries + len(indexed), frozenset(segments),
+                            directory_stamp, legacy)
+    return [entry for entry in entries if entry[1] is not None], position
+
+
+def read_records(path, source=None):
+    """
+    Yield (source path, record) for each row of an attempt file (``source``,
+    default its name) or a segment (the row's SOURCE_FIELD).
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            row_source = row.pop(SOURCE_FIELD, None) or source or os.path.basename(path)
+            yield row_source, {k: parse_value(k, v) for k, v in row.items() if k}
+
+
+# ==========================
+# Compaction
+# ==========================
+def compact(directory=SUBMISSIONS_DIR, before=None):
+    """
+    Fold the tail files of every day before ``before`` (a ``YYYYMMDD`` string;
+    default today, which is still being written) into that day's segment.
+    A day that already has a segment gets a new one with the late files
+    added. Returns {day: files compacted}.
+    """
+    before = before or datetime.now().strftime("%Y%m%d")
+    with _LOCK:
+        manifest = read_manifest(directory)
+        days = {}
+        for relative in tail_files(directory, manifest):
+            match = ATTEMPT_FILE.search(relative)
+            if match and match.group(1) < before and os.path.exists(_full_path(directory, relative)):
+                days.setdefault(match.group(1), []).append(relative)
+        if not days:
+            return {}
+        segment_dir = os.path.join(directory, SEGMENT_DIR)
+        os.makedirs(segment_dir, exist_ok=True)
+        replaced = []
+        for day, files in sorted(days.items()):
+            previous = manifest["segments"].get(day)
+            rows = []
+            if previous:
+                rows += [dict(record, **{SOURCE_FIELD: source}) for source, record in
+                         read_records(os.path.join(segment_dir, previous["file"]))]
+                replaced.append(previous["file"])
+            for relative in files:
+                rows += [dict(record, **{SOURCE_FIELD: source}) for source, record in
+                         read_records(_full_path(directory, relative), relative)]
+            fields = [SOURCE_FIELD]
+            for row in rows:
+                fields += [field for field in row if field not in fields]
+            name = f"{day}.{datetime.now().strftime('%H%M%S%f')}.csv.gz"  # new name: readers re-read it
+            data = _csv_bytes(fields, ({k: "" if v is None else v for k, v in row.items()} for row in rows))
+            _write_atomic(os.path.join(segment_dir, name), gzip.compress(data))
+            manifest["segments"][day] = {
+                "file": name,
+                "rows": len(rows),
+                "sources": (previous["sources"] if previous else []) + files,
+            }
+        _write_atomic(os.path.join(segment_dir, MANIFEST), json.dumps(manifest, indent=1).encode("utf-8"))
+        # The segment manifest now covers the sources, so removing them is safe to interrupt
+        for files in days.values():
+            for relative in files:
+                path = _full_path(directory, relative)
+                os.remove(path)
+                _remove_empty_shards(directory, os.path.dirname(path))
+        for file in replaced:
+            os.remove(os.path.join(segment_dir, file))
+        return {day: len(files) for day, files in days.items()}
+
+
+def _remove_empty_shards(directory, shard):
+    # Day, then month, then year directory, while they are empty
+    while os.path.abspath(shard) != os.path.abspath(directory):
+        try:
+            os.rmdir(shard)
+        except OSError:
+            return  # not empty (or already gone)
+        shard = os.path.dirname(shard)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command not in ("compact", "reindex"):
+        sys.exit("usage: python submission_files.py {compact|reindex} [directory]")
+    source = sys.argv[2] if len(sys.argv) > 2 else SUBMISSIONS_DIR
+    if command == "compact":
+        compacted = compact(source)
+        for day, count in sorted(compacted.items()):
+            print(f"{day}: compacted {count} file(s)")
+        print(f"{len(tail_files(source))} file(s) left in the tail")
+    else:
+        added = reindex(source)
+        print(f"added {len(added)} manifest line(s)")
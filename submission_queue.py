@@ -0,0 +1,331 @@
+"""
+Write-behind queue for saving submissions.
+
+The results page hands its record to ``submit``, which only enqueues it, so
+the page never waits on the disk (or a slow network volume). One background
+writer thread per process drains the bounded queue in batches: each batch is
+one store transaction, made durable with one fsync (see
+``submission_store.save_submissions``). A batch that fails on a transient
+error (a locked, busy or unreachable store: ``sqlite3.OperationalError`` or
+an OSError in TRANSIENT_ERRNOS) is retried with backoff until the store is
+back, however long that takes. Any other error is retried up to MAX_ATTEMPTS
+times; then the batch is split in halves until the failing records are
+isolated, so one bad record does not hold back the others. A single record
+that still fails is a dead letter: it is kept in memory (``dead_letters``)
+and appended to DEAD_LETTER_FILE. ``replay_dead_letters`` queues the file's
+records again; ``start`` does so once per process, the admin page on demand,
+and the writer itself (for the transient ones) whenever the store comes back
+after an outage. The queue is flushed at interpreter exit (atexit); records
+that cannot be saved before the writer stops become dead letters.
+
+Delivery is at least once: a batch may be written again after an error that
+happened after the commit, and the same attempt may be submitted twice by a
+rerun. The attempt ID is the store key, so repeats are no-ops. Records still
+queued when the process is killed outright are lost; a normal shutdown
+flushes them.
+
+If the queue is full (the store has been unavailable for a while), ``submit``
+waits up to SUBMIT_TIMEOUT_SECONDS for room and then tries one synchronous
+save; if that fails too the record is a dead letter, so a submission is never
+dropped and ``submit`` never raises.
+"""
+import atexit
+import errno
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import submission_store
+
+MAX_QUEUE = 1000
+BATCH_SIZE = 100
+BATCH_WAIT_SECONDS = 0.05  # how long a batch waits for more records to join it
+SUBMIT_TIMEOUT_SECONDS = 5.0
+RETRY_DELAY_SECONDS = 0.5
+MAX_RETRY_DELAY_SECONDS = 10.0
+FLUSH_TIMEOUT_SECONDS = 30.0
+MAX_ATTEMPTS = 5  # for errors that are not transient
+# OSError codes of a store that may come back (busy, full, unreachable)
+TRANSIENT_ERRNOS = frozenset({errno.EAGAIN, errno.EBUSY, errno.EINTR, errno.EIO, errno.ENOSPC,
+                              errno.EDQUOT, errno.ETIMEDOUT, errno.ESTALE})
+DEAD_LETTER_FILE = os.path.join(submission_store.SUBMISSIONS_DIR, "dead_letters.jsonl")
+
+_QUEUE = queue.Queue(MAX_QUEUE)
+_LOCK = threading.Lock()
+_DONE = threading.Condition(_LOCK)  # notified when records are committed
+_STOP = threading.Event()
+_THREAD = None
+_STARTED = False
+_DEAD_LETTERS = []  # (key, record, error) of records that could not be saved
+
+_STATS = {
+    "submitted": 0,
+    "committed": 0,  # records written by the queue (including repeats of saved attempts)
+    "pending": 0,  # submitted, not yet committed
+    "max_depth": 0,
+    "batches": 0,
+    "failures": 0,
+    "overflows": 0,  # saved synchronously because the queue was full
+    "dead_letters": 0,  # records given up on (see dead_letters)
+    "replayed": 0,  # dead letters queued again
+    "last_commit_ms": 0.0,
+    "max_commit_ms": 0.0,
+    "total_commit_ms": 0.0,
+    "max_latency_ms": 0.0,  # from submit to commit
+    "total_latency_ms": 0.0,
+}
+
+
+def submit(key, record):
+    """Queue one submission record for saving under ``key`` (the attempt ID)."""
+    _ensure_writer()
+    with _LOCK:
+        _STATS["submitted"] += 1
+        _STATS["pending"] += 1
+    item = (key, record, time.monotonic())
+    try:
+        _QUEUE.put(item, timeout=SUBMIT_TIMEOUT_SECONDS)
+    except queue.Full:
+        with _LOCK:
+            _STATS["overflows"] += 1
+        error = _save([item])
+        if error is not None:
+            _dead_letter(item, error)
+        return
+    with _LOCK:
+        _STATS["max_depth"] = max(_STATS["max_depth"], _QUEUE.qsize())
+
+
+def start():
+    """Start the writer and, the first time in this process, queue the dead letters again."""
+    global _STARTED
+    _ensure_writer()
+    with _LOCK:
+        if _STARTED:
+            return
+        _STARTED = True
+    replay_dead_letters()
+
+
+def _ensure_writer():
+    global _THREAD
+    with _LOCK:
+        if _THREAD is None or not _THREAD.is_alive():
+            _STOP.clear()
+            _THREAD = threading.Thread(target=_run, name="submission-writer", daemon=True)
+            _THREAD.start()
+
+
+def _next_batch():
+    """Up to BATCH_SIZE queued items (waits briefly for the first); [] if none."""
+    try:
+        batch = [_QUEUE.get(timeout=0.5)]
+    except queue.Empty:
+        return []
+    deadline = time.monotonic() + BATCH_WAIT_SECONDS
+    while len(batch) < BATCH_SIZE:
+        try:
+            batch.append(_QUEUE.get(timeout=max(deadline - time.monotonic(), 0)))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _run():
+    while not (_STOP.is_set() and _QUEUE.empty()):
+        batch = _next_batch()
+        if batch:
+            _commit(batch)
+
+
+def _transient(error):
+    """True for errors of a store that may come back (locked, busy, full, unreachable)."""
+    if isinstance(error, sqlite3.OperationalError):
+        return True
+    return isinstance(error, OSError) and error.errno in TRANSIENT_ERRNOS
+
+
+def _commit(batch):
+    """Save ``batch``, retrying with backoff; then isolate the records that keep failing."""
+    error = _save_with_retries(batch)
+    if error is None:
+        return
+    if _transient(error):
+        # The writer is stopping while the store is unavailable: keep them for the next start
+        for item in batch:
+            _dead_letter(item, error)
+    elif len(batch) == 1:
+        _dead_letter(batch[0], error)
+    else:
+        _isolate(batch)
+
+
+def _save_with_retries(batch):
+    """
+    Save ``batch``; returns None once committed, or the last error: a permanent
+    one after MAX_ATTEMPTS, a transient one only when the writer is stopping.
+    """
+    delay = RETRY_DELAY_SECONDS
+    attempts = outages = 0
+    while True:
+        error = _save(batch)
+        if error is None:
+            if outages:
+                # The store is back: queue the records given up on during the outage
+                replay_dead_letters(transient_only=True)
+            return None
+        if _transient(error):
+            outages += 1
+            if _STOP.is_set():
+                return error
+        else:
+            attempts += 1
+            if attempts >= MAX_ATTEMPTS:
+                return error
+        _STOP.wait(delay)
+        delay = min(delay * 2, MAX_RETRY_DELAY_SECONDS)
+
+
+def _isolate(batch):
+    # Bisect with one attempt per half; single records get their own retries
+    middle = len(batch) // 2
+    for half in (batch[:middle], batch[middle:]):
+        if len(half) == 1:
+            _commit(half)
+        elif _save(half) is not None:
+            _isolate(half)
+
+
+def _save(batch):
+    """One attempt at saving ``batch``; returns the error, or None once it is committed."""
+    started = time.monotonic()
+    try:
+        submission_store.save_submissions([(key, record) for key, record, _ in batch], durable=True)
+    except Exception as exc:
+        with _LOCK:
+            _STATS["failures"] += 1
+        return exc
+    finished = time.monotonic()
+    commit_ms = (finished - started) * 1000
+    latencies = [(finished - enqueued) * 1000 for _, _, enqueued in batch]
+    with _LOCK:
+        _STATS["committed"] += len(batch)
+        _STATS["pending"] -= len(batch)
+        _STATS["batches"] += 1
+        _STATS["last_commit_ms"] = commit_ms
+        _STATS["max_commit_ms"] = max(_STATS["max_commit_ms"], commit_ms)
+        _STATS["total_commit_ms"] += commit_ms
+        _STATS["max_latency_ms"] = max(_STATS["max_latency_ms"], *latencies)
+        _STATS["total_latency_ms"] += sum(latencies)
+        _DONE.notify_all()
+    return None
+
+
+def _dead_letter(item, error):
+    key, record, _ = item
+    entry = (key, record, f"{type(error).__name__}: {error}")
+    line = json.dumps({"key": key, "record": record, "error": entry[2], "transient": _transient(error)},
+                      default=str)
+    try:
+        _append_dead_letters([line])
+    except OSError:
+        pass  # still kept in memory
+    with _LOCK:
+        _DEAD_LETTERS.append(entry)
+        _STATS["dead_letters"] += 1
+        _STATS["pending"] -= 1
+        _DONE.notify_all()
+
+
+def _append_dead_letters(lines):
+    os.makedirs(os.path.dirname(DEAD_LETTER_FILE) or ".", exist_ok=True)
+    with open(DEAD_LETTER_FILE, "a", encoding="utf-8") as f:
+        f.write("".join(line + "\n" for line in lines))
+
+
+def dead_letters():
+    """(key, record, error) of the records this process gave up on and has not queued again."""
+    with _LOCK:
+        return list(_DEAD_LETTERS)
+
+
+def replay_dead_letters(transient_only=False):
+    """
+    Queue the records of DEAD_LETTER_FILE again (only those that failed on a
+    transient error with ``transient_only``); returns how many were queued.
+    The attempt ID is the store key, so a record saved meanwhile is not
+    duplicated. Records that are not queued (including those that do not fit
+    in the queue) stay in the file.
+    """
+    _ensure_writer()
+    replaying = f"{DEAD_LETTER_FILE}.{os.getpid()}.{threading.get_ident()}.replay"
+    try:
+        os.replace(DEAD_LETTER_FILE, replaying)  # atomic: two replays never queue the same lines
+    except FileNotFoundError:
+        return 0
+    with open(replaying, encoding="utf-8") as f:
+        lines = [line.rstrip("\n") for line in f if line.strip()]
+    kept, replayed, queued = [], set(), 0
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            kept.append(line)
+            continue
+        if transient_only and not entry.get("transient"):
+            kept.append(line)
+            continue
+        with _LOCK:
+            _STATS["pending"] += 1
+        try:
+            _QUEUE.put_nowait((entry["key"], entry["record"], time.monotonic()))
+        except queue.Full:
+            with _LOCK:
+                _STATS["pending"] -= 1
+            kept.append(line)
+            continue
+        replayed.add(entry["key"])
+        queued += 1
+    if kept:
+        _append_dead_letters(kept)
+    os.remove(replaying)
+    with _LOCK:
+        _STATS["replayed"] += queued
+        _DEAD_LETTERS[:] = [entry for entry in _DEAD_LETTERS if entry[0] not in replayed]
+    return queued
+
+
+def flush(timeout=FLUSH_TIMEOUT_SECONDS):
+    """Wait until every submitted record is committed; returns False on timeout."""
+    with _LOCK:
+        return _DONE.wait_for(lambda: _STATS["pending"] == 0, timeout)
+
+
+def shutdown(timeout=FLUSH_TIMEOUT_SECONDS):
+    """Flush the queue and stop the writer (registered with atexit)."""
+    flushed = flush(timeout)
+    _STOP.set()
+    thread = _THREAD
+    if thread is not None:
+        thread.join(timeout)
+    return flushed
+
+
+atexit.register(shutdown)
+
+
+def stats():
+    """Queue depth, pending records, batch and commit-latency counters."""
+    with _LOCK:
+        snapshot = dict(_STATS)
+    batches, committed = snapshot.pop("batches"), snapshot["committed"]
+    snapshot.update(
+        depth=_QUEUE.qsize(),
+        batches=batches,
+        avg_commit_ms=snapshot.pop("total_commit_ms") / batches if batches else 0.0,
+        avg_latency_ms=snapshot.pop("total_latency_ms") / committed if committed else 0.0,
+    )
+    return snapshot
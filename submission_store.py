@@ -0,0 +1,593 @@
+"""
+Submissions store.
+
+Completed attempts are kept in one SQLite database in WAL mode
+(``submissions/submissions.db``) rather than one CSV file per attempt, so the
+admin dashboard reads every submission with a single indexed query instead of
+listing and parsing a directory. WAL lets readers run alongside a writer, and
+the busy timeout serializes writers from several server processes.
+
+Each row carries a unique ``submission_key`` (the attempt ID); saving the same
+key twice is a no-op, which makes both saving and the legacy CSV import
+idempotent.
+
+The per-attempt CSV files written by earlier versions can be imported with
+``import_csv_files``. Deployments that keep writing those files
+(``SUBMISSIONS_BACKEND=files``) use the database as an index of the folder:
+``refresh`` imports the files and compacted segments that are new since the
+last call (see ``submission_files``). Older versions also saved an attempt again on every
+results-page rerun; ``dedupe_csv_files`` and ``dedupe_submissions`` collapse
+those copies. The import and ``dedupe_submissions`` run automatically when
+the database is first created; files on disk are only moved on request::
+
+    python submission_store.py import [submissions]
+    python submission_store.py dedupe [submissions]
+"""
+import contextlib
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import submission_files
+
+SUBMISSIONS_DIR = submission_files.SUBMISSIONS_DIR
+DB_PATH = os.path.join(SUBMISSIONS_DIR, "submissions.db")
+BUSY_TIMEOUT_MS = 10000
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# "sqlite": attempts are saved to the database. "files": attempts are saved as
+# per-attempt CSV files (see submission_files) and indexed into the database
+# by refresh()
+BACKEND = os.environ.get("SUBMISSIONS_BACKEND", "sqlite")
+
+# Identical copies of an attempt saved this close together are results-page
+# reruns, not a retake
+DUPLICATE_WINDOW = timedelta(hours=1)
+
+# Submission record field -> column
+COLUMNS = {
+    "Name": "name",
+    "Email": "email",
+    "Submitted At": "submitted_at",
+    "Total Questions": "total_questions",
+    "Correct Answers": "correct_answers",
+    "Score (%)": "score",
+    "Partial Score (%)": "partial_score",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY,
+    submission_key TEXT NOT NULL UNIQUE,
+    name TEXT,
+    email TEXT,
+    submitted_at TEXT,
+    total_questions INTEGER,
+    correct_answers INTEGER,
+    score REAL,
+    partial_score REAL,
+    answers TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS submissions_email ON submissions (email);
+CREATE INDEX IF NOT EXISTS submissions_submitted_at ON submissions (submitted_at);
+CREATE INDEX IF NOT EXISTS submissions_score ON submissions (score);
+
+-- Bumped on every change, so readers can tell whether cached frames are stale
+CREATE TABLE IF NOT EXISTS store_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL,
+    deletions INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO store_version VALUES (1, 0, 0);
+CREATE TRIGGER IF NOT EXISTS submissions_inserted AFTER INSERT ON submissions
+BEGIN
+    UPDATE store_version SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS submissions_deleted AFTER DELETE ON submissions
+BEGIN
+    UPDATE store_version SET version = version + 1, deletions = deletions + 1 WHERE id = 1;
+END;
+
+-- Running aggregates for the dashboard summary, updated in the same
+-- transaction as every insert and delete (see aggregates())
+CREATE TABLE IF NOT EXISTS submission_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    count INTEGER NOT NULL,
+    sum_correct REAL NOT NULL,
+    sumsq_correct REAL NOT NULL,
+    sum_score REAL NOT NULL,
+    sumsq_score REAL NOT NULL,
+    scored INTEGER NOT NULL,
+    distinct_emails INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS score_histogram (
+    bucket INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS submission_emails (
+    email TEXT PRIMARY KEY,
+    submissions INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS submission_stats_inserted AFTER INSERT ON submissions
+BEGIN
+    INSERT INTO submission_emails VALUES (IFNULL(lower(trim(NEW.email)), ''), 1)
+        ON CONFLICT (email) DO UPDATE SET submissions = submissions + 1;
+    INSERT INTO score_histogram
+        SELECT MIN(MAX(CAST(NEW.score / 10 AS INTEGER), 0), 9), 1 WHERE NEW.score IS NOT NULL
+        ON CONFLICT (bucket) DO UPDATE SET count = count + 1;
+    UPDATE submission_stats SET
+        count = count + 1,
+        sum_correct = sum_correct + IFNULL(NEW.correct_answers, 0),
+        sumsq_correct = sumsq_correct + IFNULL(NEW.correct_answers * NEW.correct_answers, 0),
+        sum_score = sum_score + IFNULL(NEW.score, 0),
+        sumsq_score = sumsq_score + IFNULL(NEW.score * NEW.score, 0),
+        scored = scored + (NEW.score IS NOT NULL),
+        distinct_emails = distinct_emails
+            + (SELECT submissions = 1 AND email != '' FROM submission_emails WHERE email = IFNULL(lower(trim(NEW.email)), ''))
+    WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS submission_stats_deleted AFTER DELETE ON submissions
+BEGIN
+    UPDATE submission_emails SET submissions = submissions - 1 WHERE email = IFNULL(lower(trim(OLD.email)), '');
+    UPDATE score_histogram SET count = count - 1
+        WHERE OLD.score IS NOT NULL AND bucket = MIN(MAX(CAST(OLD.score / 10 AS INTEGER), 0), 9);
+    UPDATE submission_stats SET
+        count = count - 1,
+        sum_correct = sum_correct - IFNULL(OLD.correct_answers, 0),
+        sumsq_correct = sumsq_correct - IFNULL(OLD.correct_answers * OLD.correct_answers, 0),
+        sum_score = sum_score - IFNULL(OLD.score, 0),
+        sumsq_score = sumsq_score - IFNULL(OLD.score * OLD.score, 0),
+        scored = scored - (OLD.score IS NOT NULL),
+        distinct_emails = distinct_emails
+            - (SELECT submissions = 0 AND email != '' FROM submission_emails WHERE email = IFNULL(lower(trim(OLD.email)), ''))
+    WHERE id = 1;
+    DELETE FROM submission_emails WHERE email = IFNULL(lower(trim(OLD.email)), '') AND submissions = 0;
+END;
+"""
+
+# Admin browser: sortable record fields and rows per page
+SORT_COLUMNS = {
+    "Submitted At": "submitted_at",
+    "Score (%)": "score",
+    "Correct Answers": "correct_answers",
+    "Name": "name",
+    "Email": "email",
+}
+PAGE_SIZE = 50
+
+HISTOGRAM_BUCKETS = 10  # score bands of 10 points; 100% falls in the top band
+
+REBUILD_AGGREGATES = """
+DELETE FROM submission_stats;
+DELETE FROM score_histogram;
+DELETE FROM submission_emails;
+INSERT INTO submission_emails
+    SELECT IFNULL(lower(trim(email)), ''), COUNT(*) FROM submissions GROUP BY 1;
+INSERT INTO score_histogram
+    SELECT MIN(MAX(CAST(score / 10 AS INTEGER), 0), 9), COUNT(*) FROM submissions
+    WHERE score IS NOT NULL GROUP BY 1;
+INSERT INTO submission_stats
+    SELECT 1, COUNT(*),
+        IFNULL(SUM(correct_answers), 0), IFNULL(SUM(correct_answers * correct_answers), 0),
+        IFNULL(SUM(score), 0), IFNULL(SUM(score * score), 0), COUNT(score),
+        (SELECT COUNT(*) FROM submission_emails WHERE email != '')
+    FROM submissions;
+"""
+
+# Idle connections by database path, shared by all threads: Streamlit runs
+# every rerun on a new thread, so per-thread connections would be opened
+# (and the schema applied) on almost every rerun
+POOL_SIZE = 4
+_POOL_LOCK = threading.Lock()
+_POOL = {}
+
+# Database paths whose schema this process has applied (see connect)
+_SCHEMA_LOCK = threading.Lock()
+_SCHEMA_APPLIED = set()
+
+# Files backend: where this process's last refresh() stopped (a submission_files.ScanPosition)
+_IMPORTED_LOCK = threading.Lock()
+_IMPORTED = None
+
+# Process-wide cache of the submissions frame (see load_submissions)
+_FRAME_LOCK = threading.Lock()
+_FRAME = None
+_FRAME_STATE = None  # (db path, version, deletions, last id read)
+
+
+def connect(path=None):
+    """
+    Open (and if needed create) the store; returns a new connection, usable
+    from any thread. The schema (which writes) is applied once per process
+    and database, or again if the file was removed.
+    """
+    path = path or DB_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    created = not os.path.exists(path)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None, check_same_thread=False)
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    with _SCHEMA_LOCK:
+        if created or os.path.abspath(path) not in _SCHEMA_APPLIED:
+            conn.execute("PRAGMA journal_mode = WAL")  # persistent: recorded in the file
+            conn.executescript(SCHEMA)
+            if conn.execute("SELECT 1 FROM submission_stats").fetchone() is None:
+                rebuild_aggregates(conn)  # new store, or one created before the aggregates
+            if created:
+                import_csv_files(directory or ".", conn=conn)
+                dedupe_submissions(conn)
+            _SCHEMA_APPLIED.add(os.path.abspath(path))
+    return conn
+
+
+@contextlib.contextmanager
+def _connection(conn=None):
+    """
+    ``conn``, or a connection to DB_PATH taken from the process-wide pool for
+    the block and returned to it afterwards (at most POOL_SIZE stay open).
+    """
+    if conn is not None:
+        yield conn
+        return
+    path = DB_PATH
+    with _POOL_LOCK:
+        idle = _POOL.get(path)
+        conn = idle.pop() if idle else None
+    if conn is None:
+        conn = connect(path)
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        with _POOL_LOCK:
+            idle = _POOL.setdefault(path, [])
+            if len(idle) < POOL_SIZE:
+                idle.append(conn)
+                conn = None
+        if conn is not None:
+            conn.close()
+
+
+def _insert(conn, key, record):
+    values = [record.get(field) for field in COLUMNS]
+    answers = {k: v for k, v in record.items() if k not in COLUMNS}
+    cursor = conn.execute(
+        f"INSERT OR IGNORE INTO submissions (submission_key, {', '.join(COLUMNS.values())}, answers) "
+        f"VALUES ({', '.join('?' * (len(COLUMNS) + 2))})",
+        [key, *values, json.dumps(answers)],
+    )
+    return cursor.rowcount == 1
+
+
+def save_submission(key, record, conn=None):
+    """
+    Store one submission record (the dict the results page builds).
+    Returns False if a submission with ``key`` already exists. With the files
+    backend the record is written as an attempt file instead.
+    """
+    return save_submissions([(key, record)], conn) == 1
+
+
+def save_submissions(items, conn=None, durable=False):
+    """
+    Store a batch of (key, record) pairs in one transaction; returns the
+    number of new submissions. ``durable`` syncs the commit to disk (one
+    fsync for the batch) instead of at the next WAL checkpoint. With the
+    files backend each record is written as an attempt file.
+    """
+    if BACKEND == "files":
+        submission_files.save_submissions(items, SUBMISSIONS_DIR)
+        return len(items)
+    with _connection(conn) as conn:
+        if durable:
+            conn.execute("PRAGMA synchronous = FULL")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                inserted = sum(_insert(conn, key, record) for key, record in items)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            if durable:
+                conn.execute("PRAGMA synchronous = NORMAL")
+        return inserted
+
+
+def count_submissions(conn=None):
+    with _connection(conn) as conn:
+        return conn.execute("SELECT count FROM submission_stats WHERE id = 1").fetchone()[0]
+
+
+# ==========================
+# Running aggregates
+# ==========================
+def rebuild_aggregates(conn=None):
+    """Recompute the aggregate tables from the submissions (one transaction)."""
+    with _connection(conn) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in REBUILD_AGGREGATES.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def aggregates(conn=None):
+    """
+    Summary of all submissions from the running aggregates, in O(1):
+    count, mean and standard deviation of correct answers and score, the
+    number of distinct emails and the score histogram (HISTOGRAM_BUCKETS
+    counts of 10-point bands).
+    """
+    with _connection(conn) as conn:
+        count, sum_correct, sumsq_correct, sum_score, sumsq_score, scored, emails = conn.execute(
+            "SELECT count, sum_correct, sumsq_correct, sum_score, sumsq_score, scored, distinct_emails "
+            "FROM submission_stats WHERE id = 1"
+        ).fetchone()
+        histogram = [0] * HISTOGRAM_BUCKETS
+        for bucket, bucket_count in conn.execute("SELECT bucket, count FROM score_histogram"):
+            histogram[bucket] = bucket_count
+        return {
+            "count": count,
+            "avg_correct": sum_correct / count if count else 0.0,
+            "std_correct": _stddev(count, sum_correct, sumsq_correct),
+            "avg_score": sum_score / scored if scored else 0.0,
+            "std_score": _stddev(scored, sum_score, sumsq_score),
+            "unique_emails": emails,
+            "score_histogram": histogram,
+        }
+
+
+def _stddev(n, total, total_sq):
+    if n < 2:
+        return 0.0
+    return math.sqrt(max(total_sq - total * total / n, 0.0) / (n - 1))
+
+
+def store_version(conn=None):
+    """(version, deletions) counters of the store; version changes on every write."""
+    with _connection(conn) as conn:
+        return conn.execute("SELECT version, deletions FROM store_version WHERE id = 1").fetchone()
+
+
+def _record(row):
+    """Submission record from a (COLUMNS..., answers) row."""
+    record = dict(zip(COLUMNS, row[:-1]))
+    record.update(json.loads(row[-1]))
+    return record
+
+
+def _read_submissions(conn, after_id=0):
+    """Submissions with id > ``after_id`` as (DataFrame, last id), in id order."""
+    cursor = conn.execute(
+        f"SELECT id, {', '.join(COLUMNS.values())}, answers FROM submissions WHERE id > ? ORDER BY id",
+        (after_id,),
+    )
+    records = []
+    last_id = after_id
+    for row in cursor:
+        records.append(_record(row[1:]))
+        last_id = row[0]
+    return pd.DataFrame(records, columns=None if records else list(COLUMNS)), last_id
+
+
+def iter_records(batch_size=1000, conn=None):
+    """Yield every submission record in save order, reading ``batch_size`` rows at a time."""
+    with _connection(conn) as conn:
+        cursor = conn.execute(f"SELECT {', '.join(COLUMNS.values())}, answers FROM submissions ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield _record(row)
+
+
+def query_submissions(search="", submitted_from=None, submitted_to=None, min_score=None, max_score=None,
+                      sort_by="Submitted At", descending=True, page=0, page_size=PAGE_SIZE, conn=None):
+    """
+    One page of submissions matching the filters, evaluated in SQLite so only
+    that page is read and parsed. Returns (DataFrame, total matches).
+
+    - ``search``: case-insensitive substring of the name or email
+    - ``submitted_from`` / ``submitted_to``: inclusive ``datetime.date`` bounds
+    - ``min_score`` / ``max_score``: inclusive score band (percent)
+    - ``sort_by``: a key of SORT_COLUMNS; ties are broken by save order
+    """
+    with _connection(conn) as conn:
+        clauses, params = [], []
+        if search:
+            pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append("(name LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\')")
+            params += [pattern, pattern]
+        if submitted_from is not None:
+            clauses.append("submitted_at >= ?")
+            params.append(submitted_from.strftime("%Y-%m-%d"))
+        if submitted_to is not None:
+            clauses.append("submitted_at < ?")
+            params.append((submitted_to + timedelta(days=1)).strftime("%Y-%m-%d"))
+        if min_score is not None:
+            clauses.append("score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            clauses.append("score <= ?")
+            params.append(max_score)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        total = conn.execute(f"SELECT COUNT(*) FROM submissions {where}", params).fetchone()[0]
+        direction = "DESC" if descending else "ASC"
+        cursor = conn.execute(
+            f"SELECT {', '.join(COLUMNS.values())}, answers FROM submissions {where} "
+            f"ORDER BY {SORT_COLUMNS[sort_by]} {direction}, id {direction} LIMIT ? OFFSET ?",
+            params + [page_size, page * page_size],
+        )
+        records = [_record(row) for row in cursor]
+        return pd.DataFrame(records, columns=None if records else list(COLUMNS)), total
+
+
+def load_submissions(conn=None):
+    """
+    All submissions as a DataFrame with the original record columns, in save
+    order. The frame is cached per process and shared by all sessions: a
+    rerun with no new writes costs one version lookup, and new submissions
+    are parsed and appended on their own. A deletion triggers a full reload.
+    The returned frame is shared; callers must not modify it in place.
+    """
+    global _FRAME, _FRAME_STATE
+    with _connection(conn) as conn:
+        with _FRAME_LOCK:
+            version, deletions = store_version(conn)
+            state = _FRAME_STATE
+            if state is not None and state[0] == DB_PATH and state[2] == deletions:
+                if state[1] == version:
+                    return _FRAME
+                new, last_id = _read_submissions(conn, state[3])
+                frame = pd.concat([_FRAME, new], ignore_index=True) if len(new) else _FRAME
+            else:
+                frame, last_id = _read_submissions(conn)
+            # Frames with the same lineage only ever grow by appended rows
+            frame.attrs["lineage"] = (DB_PATH, deletions)
+            _FRAME, _FRAME_STATE = frame, (DB_PATH, version, deletions, last_id)
+            return frame
+
+
+# ==========================
+# CSV files (legacy and the files backend)
+# ==========================
+def import_csv_files(directory=SUBMISSIONS_DIR, conn=None):
+    """
+    Import the per-attempt CSV files and compacted segments of ``directory``
+    (see ``submission_files``) in one transaction. Idempotent: each row is
+    keyed by its source file name. Returns the number of new submissions.
+    """
+    with _connection(conn) as conn:
+        return _import_entries(conn, submission_files.scan(directory))
+
+
+def _import_entries(conn, entries):
+    imported = 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for path, _, source in entries:
+            try:
+                for row_source, record in submission_files.read_records(path, source):
+                    imported += _insert(conn, f"csv:{row_source}", record)
+            except FileNotFoundError:
+                pass  # compacted meanwhile; its new segment is read next time
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    return imported
+
+
+def refresh():
+    """
+    With the files backend, index attempt files and segments written since
+    the last call (by any process) into the store; a no-op otherwise. Only
+    manifest lines and segments added since the last call are read.
+    """
+    global _IMPORTED
+    if BACKEND == "files":
+        with _IMPORTED_LOCK:
+            entries, position = submission_files.scan_since(_IMPORTED, SUBMISSIONS_DIR)
+            if entries:
+                with _connection() as conn:
+                    _import_entries(conn, entries)
+            _IMPORTED = position
+
+
+# ==========================
+# Duplicate cleanup
+# ==========================
+def _attempt_fingerprint(record):
+    """Identity of an attempt's content (everything but the submission time)."""
+    content = {k: v for k, v in record.items() if k != "Submitted At" and v is not None}
+    content["Email"] = str(content.get("Email", "")).strip().lower()
+    return json.dumps(content, sort_keys=True, default=str)
+
+
+def find_duplicates(records, window=DUPLICATE_WINDOW):
+    """
+    Indices of records that repeat an earlier record of the same attempt: the
+    same content saved again within ``window`` of the previous copy (a results
+    page rerun). ``records`` must be in submission-time order; the earliest
+    copy is kept.
+    """
+    last_seen = {}
+    duplicates = []
+    for index, record in enumerate(records):
+        fingerprint = _attempt_fingerprint(record)
+        try:
+            submitted = datetime.strptime(str(record.get("Submitted At")), TIME_FORMAT)
+        except ValueError:
+            continue
+        previous = last_seen.get(fingerprint)
+        if previous is not None and submitted - previous <= window:
+            duplicates.append(index)
+        last_seen[fingerprint] = submitted
+    return duplicates
+
+
+def dedupe_submissions(conn=None, window=DUPLICATE_WINDOW):
+    """Delete repeated copies of an attempt from the store; returns how many."""
+    with _connection(conn) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                f"SELECT id, {', '.join(COLUMNS.values())}, answers FROM submissions ORDER BY submitted_at, id"
+            ).fetchall()
+            records = [_record(row[1:]) for row in rows]
+            ids = [(rows[i][0],) for i in find_duplicates(records, window)]
+            conn.executemany("DELETE FROM submissions WHERE id = ?", ids)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return len(ids)
+
+
+def dedupe_csv_files(directory=SUBMISSIONS_DIR, window=DUPLICATE_WINDOW):
+    """
+    Move repeated legacy per-attempt CSV files into ``directory/duplicates`` (nothing
+    is deleted); returns the moved file names.
+    """
+    files, records = [], []
+    for file in submission_files.legacy_files(directory):
+        for _, record in submission_files.read_records(os.path.join(directory, file)):
+            files.append(file)
+            records.append(record)
+    order = sorted(range(len(records)), key=lambda i: (str(records[i].get("Submitted At")), files[i]))
+    duplicates = sorted({files[order[i]] for i in find_duplicates([records[i] for i in order], window)})
+    if duplicates:
+        os.makedirs(os.path.join(directory, "duplicates"), exist_ok=True)
+    for file in duplicates:
+        os.replace(os.path.join(directory, file), os.path.join(directory, "duplicates", file))
+    return duplicates
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command not in ("import", "dedupe"):
+        sys.exit("usage: python submission_store.py {import|dedupe} [directory]")
+    source = sys.argv[2] if len(sys.argv) > 2 else SUBMISSIONS_DIR
+    if command == "import":
+        imported = import_csv_files(source)
+        print(f"imported {imported} new submission(s) from {source}; {DB_PATH} holds {count_submissions()}")
+    else:
+        moved = dedupe_csv_files(source)
+        print(f"moved {len(moved)} duplicate file(s) to {os.path.join(source, 'duplicates')}")
+        print(f"removed {dedupe_submissions()} duplicate submission(s) from {DB_PATH}")
@@ -0,0 +1,15 @@
+import pytest
+
+import dialect
+
+
+def test_nesting_past_the_limit_is_rejected():
+    depth = dialect.MAX_NESTING_DEPTH + 1
+    with pytest.raises(dialect.QueryTooComplex):
+        dialect.to_sqlite("SELECT " + "(" * depth + "1" + ")" * depth + " FROM shippers")
+
+
+@pytest.mark.parametrize("call", ["ABS(", "YEAR(", "DATEADD(foo, 1, "])
+def test_nested_calls_at_the_limit_translate(call):
+    depth = dialect.MAX_NESTING_DEPTH
+    assert dialect.to_sqlite("SELECT " + call * depth + "1" + ")" * depth).startswith("SELECT ")
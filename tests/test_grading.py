@@ -0,0 +1,37 @@
+import grading
+
+COLUMNS = ["city", "total"]
+ROWS = [("Paris", 3), ("Berlin", 3), ("Lyon", 1)]
+
+
+def order_keys(sql):
+    return grading.reference_order_keys(sql, COLUMNS, ROWS)
+
+
+def test_rows_tying_on_the_order_by_keys_may_come_in_any_order():
+    keys = order_keys("SELECT city, COUNT(*) AS total FROM customers GROUP BY city ORDER BY total DESC")
+    tie_swapped = [ROWS[1], ROWS[0], ROWS[2]]
+    assert grading.fingerprint(COLUMNS, tie_swapped, keys) == grading.fingerprint(COLUMNS, ROWS, keys)
+    assert grading.fingerprint(COLUMNS, ROWS[::-1], keys) != grading.fingerprint(COLUMNS, ROWS, keys)
+
+
+def test_order_by_a_column_outside_the_result_compares_the_whole_order():
+    keys = order_keys("SELECT city, COUNT(*) AS total FROM customers GROUP BY city ORDER BY MAX(customerid)")
+    tie_swapped = [ROWS[1], ROWS[0], ROWS[2]]
+    assert grading.fingerprint(COLUMNS, tie_swapped, keys) != grading.fingerprint(COLUMNS, ROWS, keys)
+
+
+def test_without_order_by_row_order_is_ignored():
+    assert order_keys("SELECT city, COUNT(*) AS total FROM customers GROUP BY city") is None
+    assert grading.fingerprint(COLUMNS, ROWS[::-1]) == grading.fingerprint(COLUMNS, ROWS)
+
+
+def test_query_key_drops_only_layout_and_case():
+    assert grading.query_key("select  CompanyName\n-- names\nFROM customers;") == \
+        grading.query_key("SELECT companyname FROM Customers")
+    assert grading.query_key("SELECT * FROM customers WHERE country = 'France'") != \
+        grading.query_key("SELECT * FROM customers WHERE country = 'france'")
+    assert grading.query_key('SELECT * FROM customers WHERE country = "France"') != \
+        grading.query_key('SELECT * FROM customers WHERE country = "france"')
+    assert grading.query_key("SELECT birthdate, firstname, lastname, title FROM employees ORDER BY 1") != \
+        grading.query_key("SELECT firstname, lastname, title, birthdate FROM employees ORDER BY 1")
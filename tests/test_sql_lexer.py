@@ -0,0 +1,66 @@
+import pytest
+
+from sql_lexer import normalize_sql
+
+
+@pytest.mark.parametrize("left, right", [
+    ("SELECT unitprice * quantity FROM orderdetails", "SELECT unitprice * discount FROM orderdetails"),
+    ("SELECT firstname + ' ' + lastname FROM employees", "SELECT firstname + ' ' + title FROM employees"),
+    ("SELECT a - b FROM t", "SELECT a - c FROM t"),
+    ("SELECT firstname || lastname FROM employees", "SELECT firstname || title FROM employees"),
+])
+def test_last_operand_is_not_an_alias(left, right):
+    assert normalize_sql(left) != normalize_sql(right)
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT a - b FROM t", "select a - b from t"),
+    ("SELECT unitprice * quantity total FROM orderdetails", "select unitprice * quantity from orderdetails"),
+    ("SELECT COUNT(*) total FROM orders", "select count ( * ) from orders"),
+    ("SELECT c.companyname name FROM customers c", "select companyname from customers"),
+    ("SELECT CASE WHEN x > 1 THEN 'y' END flag FROM t", "select case when x > 1 then 'y' end from t"),
+])
+def test_bare_alias_after_an_operand_is_dropped(sql, expected):
+    assert normalize_sql(sql) == expected
+
+
+@pytest.mark.parametrize("sql", [
+    'SELECT * FROM ""', "SELECT * FROM []", 'SELECT "" FROM t', "SELECT a [] FROM t",
+    "", ";", "'", "select", "from", "(((", "select * from t order by", "select a from t join",
+])
+def test_candidate_input_never_raises(sql):
+    assert isinstance(normalize_sql(sql), str)
+
+
+@pytest.mark.parametrize("left, right", [
+    # Positional ORDER BY / GROUP BY terms follow the sorted SELECT list
+    ("SELECT birthdate, firstname, lastname, title FROM employees ORDER BY 1",
+     "SELECT firstname, lastname, title, birthdate FROM employees ORDER BY 1"),
+    ("SELECT country, city, COUNT(*) FROM customers GROUP BY 1, 2",
+     "SELECT city, country, COUNT(*) FROM customers GROUP BY 1, 2"),
+    # Self-join: the two aliases of one table stay apart
+    ("SELECT e1.firstname, e2.lastname FROM employees e1 JOIN employees e2 ON e1.reportsto = e2.employeeid",
+     "SELECT e2.firstname, e1.lastname FROM employees e1 JOIN employees e2 ON e1.reportsto = e2.employeeid"),
+    # One alias name declared in two scopes
+    ("SELECT o.orderid FROM orders o WHERE EXISTS (SELECT 1 FROM orderdetails o WHERE o.quantity > 10)",
+     "SELECT orders.orderid FROM orders WHERE EXISTS (SELECT 1 FROM orderdetails WHERE orders.quantity > 10)"),
+    # Double-quoted tokens keep their case
+    ('SELECT * FROM customers WHERE country = "France"', 'SELECT * FROM customers WHERE country = "france"'),
+    # The SELECT lists of a compound query pair up
+    ("SELECT city, country FROM customers UNION SELECT city, country FROM suppliers",
+     "SELECT country, city FROM customers UNION SELECT city, country FROM suppliers"),
+    # A SELECT-list alias named in GROUP BY
+    ("SELECT country AS city, COUNT(*) FROM customers GROUP BY city",
+     "SELECT country AS place, COUNT(*) FROM customers GROUP BY city"),
+])
+def test_different_queries_do_not_collide(left, right):
+    assert normalize_sql(left) != normalize_sql(right)
+
+
+@pytest.mark.parametrize("left, right", [
+    ("SELECT title, birthdate FROM employees ORDER BY 2 DESC", "SELECT birthdate, title FROM employees ORDER BY 1 DESC"),
+    ("SELECT a.firstname FROM employees a JOIN employees b ON a.reportsto = b.employeeid",
+     "SELECT boss.firstname FROM employees AS boss JOIN employees report ON boss.reportsto = report.employeeid"),
+])
+def test_equivalent_queries_share_a_form(left, right):
+    assert normalize_sql(left) == normalize_sql(right)